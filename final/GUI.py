@@ -5,7 +5,9 @@ import matplotlib.pyplot as plt
 
 # Import your algorithm modules
 from backtrack import Scheduler, Job, Op
-from cultural_algorithm import solve_with_ca
+from cultural_algorithm import evolve_ca
+from schedule import DECODERS
+from dispatching import solve_with_rules
 
 
 class JobSchedulerApp:
@@ -64,6 +66,12 @@ class JobSchedulerApp:
         self.entry_jobs = tk.Entry(input_frame, width=5)
         self.entry_jobs.grid(row=1, column=1, padx=5)
 
+        # Decoder choice (cultural only): fill idle machine gaps or always append after the last operation
+        self.fill_gaps = tk.BooleanVar(value=False)
+        if algorithm == "cultural":
+            tk.Checkbutton(input_frame, text="Fill idle gaps (active decoder)", font=("Arial", 12),
+                           variable=self.fill_gaps).grid(row=2, column=0, columnspan=2, pady=5)
+
         tk.Button(frame, text="Create Job Inputs", font=("Arial", 12),
                   command=self.create_job_frames).pack(pady=10)
 
@@ -75,6 +83,10 @@ class JobSchedulerApp:
                                     command=self.run_algorithm_thread)
         self.run_button.pack(pady=10)
 
+        # Live progress of the cultural algorithm (one line per generation)
+        self.status_label = tk.Label(frame, text="", font=("Arial", 11))
+        self.status_label.pack(pady=5)
+
         # Back Button
         tk.Button(frame, text="Back", font=("Arial", 12),
                   command=self.show_main_menu).pack(pady=10)
@@ -164,14 +176,22 @@ class JobSchedulerApp:
                     ops_objs = [Op(i, d, m) for i, (m, d) in enumerate(job_ops)]
                     job_objects.append(Job(j_index, ops_objs))
                 scheduler = Scheduler(self.num_machines, job_objects)
-                solution, makespan = scheduler.solve()
+                # warm start from the best dispatching rule so pruning is tight from the first node
+                incumbent, _, _ = solve_with_rules(jobs_input, self.num_machines)
+                solution, makespan = scheduler.solve(incumbent=incumbent)
                 if solution is None:
                     self.root.after(0, lambda: messagebox.showinfo("Result", "No valid schedule found."))
                     return
                 self.root.after(0, lambda: self.show_gantt_backtrack(solution, makespan))
             else:
-                best_schedule, makespan = solve_with_ca(jobs_input, self.num_machines)
-                self.root.after(0, lambda: self.show_gantt_cultural(best_schedule, makespan, jobs_input))
+                decoder = "active" if self.fill_gaps.get() else "semi-active"
+                record = None
+                for record in evolve_ca(jobs_input, self.num_machines, decoder=decoder):
+                    self.root.after(0, lambda r=record: self.status_label.config(
+                        text=f"Generation {r.generation}/{r.generations}: best makespan {r.best_so_far}, "
+                             f"diversity {r.diversity:.0%}, {r.elapsed:.1f}s"))
+                best_schedule, makespan = record.best_schedule, record.best_so_far
+                self.root.after(0, lambda: self.show_gantt_cultural(best_schedule, makespan, jobs_input, decoder))
 
         except Exception as e:
             self.root.after(0, lambda: messagebox.showerror("Error", str(e)))
@@ -191,21 +211,11 @@ class JobSchedulerApp:
         plt.show()
 
     # ================= GANTT CHART CULTURAL =================
-    def show_gantt_cultural(self, schedule, makespan, jobs_input):
+    def show_gantt_cultural(self, schedule, makespan, jobs_input, decoder="semi-active"):
         fig, ax = plt.subplots(figsize=(12, 5))
-        machine_timers = [0] * self.num_machines
-        job_timers = [0] * len(jobs_input)
-        op_count = [0] * len(jobs_input)
-        for job in schedule:
-            op_id = op_count[job]
-            machine, duration = jobs_input[job][op_id]
-            start = max(machine_timers[machine], job_timers[job])
-            end = start + duration
-            ax.barh(machine, duration, left=start)
+        for job, op_id, machine, start, end in DECODERS[decoder](schedule, jobs_input, self.num_machines):
+            ax.barh(machine, end - start, left=start)
             ax.text(start, machine, f"J{job}O{op_id}", va="center")
-            machine_timers[machine] = end
-            job_timers[job] = end
-            op_count[job] += 1
         ax.set_title(f"Cultural Algorithm Schedule (Makespan={makespan})")
         ax.set_xlabel("Time")
         ax.set_ylabel("Machine")
@@ -1,9 +1,15 @@
 # job_scheduler_0based_gaps_lrpt_nodeps.py
-import time, copy
+import time, os, json, heapq
+from array import array
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from bisect import bisect_left, insort
+from collections import OrderedDict, Counter
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import pandas as pd
+import dispatching
 
 @dataclass
 class Op:
@@ -23,81 +29,696 @@ class Assign:
     j:int; o:int; m:int; s:int; e:int
 
 class Tracker:
-    def __init__(self): self.nodes=0; self.pruned=0; self.sol=0; self.start=0; self.end=0
+    # The counters and the incumbent history are always kept. detail=True (or registering a hook)
+    # also records per-depth node / prune histograms and the time spent in avail_ops; with it off
+    # the search only pays for one flag test per node.
+    COUNTERS = ("nodes", "pruned", "sol", "pruned_mach", "pruned_job", "tt_hits", "tt_misses")
+
+    def __init__(self, detail:bool=False):
+        self.nodes=0; self.pruned=0; self.sol=0; self.start=0; self.end=0; self.pruned_mach=0; self.pruned_job=0; self.tt_hits=0; self.tt_misses=0
+        self.max_depth=0; self.detail=detail; self.avail_time=0.0
+        self.depth_nodes: List[int] = []; self.depth_pruned: List[int] = []
+        self.incumbents: List[Tuple[float,int]] = []   # (time.time(), makespan) at each improvement
+        self.hooks: Dict[str, list] = {}
     def start_t(self): self.start=time.time()
     def end_t(self): self.end=time.time()
-    def elapsed(self): return self.end-self.start
+    def elapsed(self): return (self.end if self.end >= self.start else time.time())-self.start
+    def nodes_per_sec(self): return self.nodes/self.elapsed() if self.elapsed() > 0 else 0.0
+    def avail_share(self): return self.avail_time/self.elapsed() if self.elapsed() > 0 else 0.0
+    def tt_hit_rate(self): return self.tt_hits/(self.tt_hits+self.tt_misses) if self.tt_hits+self.tt_misses else 0.0
+
+    def add_hook(self, event:str, fn):
+        # event: "node" fn(depth), "prune" fn(depth, reason), "solution" fn(makespan), "improve" fn(makespan)
+        # solve_parallel only fires "improve" (in the master); the other events happen in the workers
+        self.hooks.setdefault(event, []).append(fn)
+        self.detail = True
+    def fire(self, event, *args):
+        for fn in self.hooks.get(event, ()): fn(*args)
+
+    def node(self, depth):
+        if depth >= len(self.depth_nodes): self.grow(depth)
+        self.depth_nodes[depth] += 1
+        if self.hooks: self.fire("node", depth)
+    def prune(self, depth, reason):
+        if depth >= len(self.depth_pruned): self.grow(depth)
+        self.depth_pruned[depth] += 1
+        if self.hooks: self.fire("prune", depth, reason)
+    def grow(self, depth):
+        for h in (self.depth_nodes, self.depth_pruned): h.extend([0]*(depth+1-len(h)))
+    def improved(self, ms):
+        self.incumbents.append((time.time(), ms))
+        if self.hooks: self.fire("improve", ms)
+
+    def merge(self, other:"Tracker"):
+        for k in self.COUNTERS:
+            setattr(self, k, getattr(self, k) + getattr(other, k))
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.avail_time += other.avail_time
+        self.grow(max(len(other.depth_nodes), len(other.depth_pruned)) - 1)
+        for mine, theirs in ((self.depth_nodes, other.depth_nodes), (self.depth_pruned, other.depth_pruned)):
+            for d, n in enumerate(theirs): mine[d] += n
+        self.incumbents = sorted(self.incumbents + other.incumbents)
+
+    def to_dict(self):
+        d = {k: getattr(self, k) for k in self.COUNTERS}
+        d.update(max_depth=self.max_depth, elapsed=self.elapsed(), nodes_per_sec=self.nodes_per_sec(),
+                 avail_ops_share=self.avail_share(), tt_hit_rate=self.tt_hit_rate(),
+                 depth_nodes=self.depth_nodes, depth_pruned=self.depth_pruned,
+                 incumbents=[(t - self.start, ms) for t, ms in self.incumbents])
+        return d
+    def to_json(self, path:Optional[str]=None) -> str:
+        text = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, "w") as f: f.write(text)
+        return text
+
+class TransTable:
+    # Bounded LRU map: canonical search state -> best makespan when its subtree was closed.
+    # Nothing below that state completes under the stored value, so a revisit can be cut
+    # as long as the incumbent is not above it.
+    # capacity counts entries, not bytes: a key holds tuples over all jobs and machines, and one
+    # entry measures about 300 + 16*jobs + 8*machines bytes (~520 B on 10x10, ~920 B on 30x20).
+    def __init__(self, capacity:int):
+        self.capacity = capacity
+        self.table = OrderedDict()
+    @staticmethod
+    def entry_bytes(machines:int, jobs:int) -> int: return 300 + 16*jobs + 8*machines
+    @classmethod
+    def for_memory(cls, mb:float, machines:int, jobs:int) -> "TransTable":
+        # as many entries as fit in about `mb` megabytes
+        return cls(max(1, int(mb * 2**20) // cls.entry_bytes(machines, jobs)))
+    def __len__(self): return len(self.table)
+    def get(self, key):
+        v = self.table.get(key)
+        if v is not None: self.table.move_to_end(key)
+        return v
+    def put(self, key, v):
+        self.table[key] = v
+        self.table.move_to_end(key)
+        if len(self.table) > self.capacity: self.table.popitem(last=False)
+
+class Bounds:
+    # Admissible makespan lower bounds, kept up to date as ops are placed / undone:
+    #   machine bound = ready time of the machine + processing still queued on it
+    #   job bound     = end of the job's last placed op + its remaining tail
+    def __init__(self, machines:int, jobs:List[Job], prog:Optional[Dict[int,int]]=None):
+        self.mach_rem = [0]*machines
+        self.job_rem = {}
+        for j in jobs:
+            ops = j.ops[prog[j.id]:] if prog else j.ops
+            self.job_rem[j.id] = sum(o.dur for o in ops)
+            for o in ops: self.mach_rem[o.mach] += o.dur
+
+    def root(self, timeline, job_last_end) -> Tuple[int,int]:
+        mlb = max((t + r for t, r in zip(timeline, self.mach_rem)), default=0)
+        jlb = max((job_last_end[j] + r for j, r in self.job_rem.items()), default=0)
+        return mlb, jlb
+
+    def unplace(self, job, op):
+        self.mach_rem[op.mach] += op.dur
+        self.job_rem[job.id] += op.dur
 
 class Scheduler:
-    def __init__(self, machines:int, jobs:List[Job]):
+    def __init__(self, machines:int, jobs:List[Job], tt_size:int=0, branching:str="lrpt", tt_mb:Optional[float]=None):
+        if branching not in ("lrpt", "gt"):
+            raise ValueError(f"unknown branching mode: {branching}")
         self.machines = machines
         self.jobs = jobs
         self.best: Optional[List[Assign]] = None
+        self.best_seq = None    # job id of each placed op, in placement order, for the incumbent
         self.best_ms = 10**9
         self.tracker = Tracker()
+        self.bounds = Bounds(machines, jobs)
+        # tt_size caps the transposition table in entries, tt_mb (if given) in megabytes instead;
+        # solve_parallel gives every worker a table of the same size
+        if tt_mb: self.tt = TransTable.for_memory(tt_mb, machines, len(jobs))
+        else: self.tt = TransTable(tt_size) if tt_size > 0 else None
+        self.branching = branching
+        self.shared = None      # mp.Value holding the incumbent makespan shared by parallel workers
+        self.node_count = None  # mp.Value counting the nodes of all parallel workers, for max_nodes
+        self.counted = 0        # this worker's nodes already added to node_count
+        self.split_at = None    # node count after which backtrack() hands back its open subtrees
+        self.poll_at = 0
+        # anytime limits, set by solve(); stop_reason says which one ended the last run
+        self.deadline_at = None; self.max_nodes = None; self.cancel = None; self.on_improve = None
+        self.stop_reason = None
+        self.optimal = False
+        self.bound = None             # makespan-only incumbent passed to set_incumbent, if any
+        self.infeasible_bound = None  # that makespan, once a complete search found no schedule within it
+        self.discrepancies = None   # limited discrepancy search budget, set by solve_lds()
+        self.truncated = False
+        self.by_id = {j.id: j for j in jobs}
+        self.total = sum(len(j.ops) for j in jobs)
+        # suffix[j][k] = work left in job j once its first k ops are done
+        self.suffix = {}
+        for j in jobs:
+            suf = [0]*(len(j.ops)+1)
+            for k in range(len(j.ops)-1, -1, -1): suf[k] = suf[k+1] + j.ops[k].dur
+            self.suffix[j.id] = suf
+
+    def set_incumbent(self, incumbent) -> int:
+        # Warm start. A complete schedule (placement sequence of job ids such as a CA chromosome or
+        # best_seq, or a list of Assign records) becomes the incumbent if it beats the current one.
+        # A bare makespan only tightens the bound to makespan + 1, so the search still has to find
+        # (and return) a schedule at least that good; if it cannot, see unbound().
+        if not hasattr(incumbent, "__len__"):
+            self.bound = int(incumbent)
+            self.best_ms = min(self.best_ms, self.bound + 1)
+            return self.best_ms
+        seq = list(incumbent)
+        if seq and isinstance(seq[0], Assign):
+            seq = [a.j for a in sorted(seq, key=lambda a: (a.s, a.e, a.o))]
+        seq = array('i', (int(jid) for jid in seq))
+        if Counter(seq) != Counter({j.id: len(j.ops) for j in self.jobs if j.ops}):
+            raise ValueError("incumbent does not place every operation exactly once")
+        _, _, timeline, _ = self.replay(seq)
+        ms = max(timeline, default=0)
+        if ms < self.best_ms:
+            self.best_ms, self.best_seq = ms, seq
+            self.tracker.improved(ms)
+        return self.best_ms
+
+    def settle(self):
+        # End of a run: expand best_seq and make best_ms its makespan again. A makespan-only
+        # incumbent can leave best_ms at a bound that no schedule was found under; the schedule
+        # held is then returned with its own makespan and nothing counts as proven.
+        ms = 10**9
+        if self.best_seq is not None:
+            self.best = self.assigns(self.best_seq)
+            ms = max((a.e for a in self.best), default=0)
+        if ms != self.best_ms:
+            self.best_ms, self.optimal = ms, False
+
+    def unbound(self, proved:bool) -> bool:
+        # A makespan-only incumbent that the search found nothing under (too optimistic or stale).
+        # proved: the search ran to the end, so no schedule is that good; the bound is kept in
+        # infeasible_bound. Either way the bound is dropped and the best dispatching-rule schedule
+        # becomes the incumbent, so the run can go on (or stop) with a real schedule.
+        if self.best_seq is not None or self.bound is None:
+            return False
+        self.infeasible_bound = self.bound if proved else None
+        self.bound, self.best_ms = None, 10**9
+        self.seed_rules()
+        return True
 
-    def avail_ops(self, prog:Dict[int,int]):
-        candidates = []
-        for j in self.jobs:
-            if j.complete(prog[j.id]): continue
-            op = j.next_op(prog[j.id])
-            if op:
-                rem = sum(o.dur for o in j.ops[prog[j.id]:])
-                candidates.append((j, op, rem))
-        # LRPT sorting
+    def seed_rules(self, rules=dispatching.RULES):
+        # Start from the best dispatching-rule schedule as incumbent (a chromosome is a placement
+        # sequence of job ids, the same encoding as best_seq), so pruning is tight from the first node.
+        jobs_input = [[(op.mach, op.dur) for op in j.ops] for j in self.jobs]
+        for scheme in dispatching.SCHEMES:
+            for rule in rules:
+                self.set_incumbent([self.jobs[k].id for k in dispatching.dispatch(jobs_input, rule, scheme=scheme)])
+        return self.best_ms
+
+    def sync(self, prog, timeline, job_last_end):
+        # Derive the incrementally maintained search state from (prog, timeline):
+        # ops still to place, running max of the timeline and the LRPT-ordered ready list
+        # of (-remaining work, -job id) keys for every unfinished job.
+        self.bounds = Bounds(self.machines, self.jobs, prog)
+        self.prog, self.timeline, self.job_last_end = prog, timeline, job_last_end
+        self.ops_left = sum(len(j.ops) - prog[j.id] for j in self.jobs)
+        self.cmax = max(timeline, default=0)
+        self.ready = sorted((-self.suffix[j.id][prog[j.id]], -j.id) for j in self.jobs if not j.complete(prog[j.id]))
+
+    def replay(self, path):
+        # State (sched, prog, timeline, job_last_end) after placing the next op of each job id in path.
+        # The working schedule is a preallocated array of job ids by placement depth; start times
+        # follow from replaying it, so the search never builds Assign objects.
+        prog = {j.id:0 for j in self.jobs}
+        timeline = [0]*self.machines
+        job_last_end = {j.id:0 for j in self.jobs}
+        for jid in path:
+            op = self.by_id[jid].ops[prog[jid]]
+            timeline[op.mach] = job_last_end[jid] = max(timeline[op.mach], job_last_end[jid]) + op.dur
+            prog[jid] += 1
+        sched = array('i', path)
+        sched.extend([0]*(self.total - len(path)))
+        return sched, prog, timeline, job_last_end
+
+    def assigns(self, seq) -> List[Assign]:
+        # Expand a placement sequence of job ids into Assign records.
+        prog = {j.id:0 for j in self.jobs}
+        timeline = [0]*self.machines
+        job_last_end = {j.id:0 for j in self.jobs}
+        out = []
+        for jid in seq:
+            op = self.by_id[jid].ops[prog[jid]]
+            start = max(timeline[op.mach], job_last_end[jid])
+            out.append(Assign(jid, op.id, op.mach, start, start + op.dur))
+            timeline[op.mach] = job_last_end[jid] = start + op.dur
+            prog[jid] += 1
+        return out
+
+    def state_key(self, prog, timeline, job_last_end):
+        # Canonical form of (prog, timeline, job_last_end): a finished job's last end and the
+        # individual ready times of machines with no work left cannot change anything below,
+        # only the largest of those machine times still counts towards the makespan.
+        mach_rem, job_rem = self.bounds.mach_rem, self.bounds.job_rem
+        return (tuple(prog.values()),
+                tuple(t if r else 0 for t, r in zip(timeline, mach_rem)),
+                max((t for t, r in zip(timeline, mach_rem) if not r), default=0),
+                tuple(e if job_rem[j] else 0 for j, e in job_last_end.items()))
+
+    def avail_ops(self, prog:Optional[Dict[int,int]]=None):
+        # LRPT: job with the most remaining work first, ties to the higher job id.
+        # Without prog this reads the live search state kept by sync()/backtrack().
+        if prog is None:
+            prog, by_id = self.prog, self.by_id
+            return [(by_id[-nj], by_id[-nj].ops[prog[-nj]]) for _, nj in self.ready]
+        candidates = [(j, j.ops[prog[j.id]], self.suffix[j.id][prog[j.id]]) for j in self.jobs if not j.complete(prog[j.id])]
         candidates.sort(key=lambda x: (x[2], x[0].id), reverse=True)
         return [(j,op) for j,op,_ in candidates]
 
-    def backtrack(self, sched, prog, timeline, job_last_end):
-        self.tracker.nodes += 1
+    def active_ops(self, ops, timeline=None, job_last_end=None):
+        # Giffler-Thompson: take the op that can finish first and keep only the ops on its
+        # machine that could start before that; any other choice leads to a schedule that is
+        # not active, and an optimal schedule is always among the active ones.
+        if timeline is None:
+            timeline, job_last_end = self.timeline, self.job_last_end
+        ect, mach = None, None
+        for job, op in ops:
+            c = max(timeline[op.mach], job_last_end[job.id]) + op.dur
+            if ect is None or c < ect: ect, mach = c, op.mach
+        return [(job, op) for job, op in ops
+                if op.mach == mach and max(timeline[mach], job_last_end[job.id]) < ect]
+
+    def visit(self, sched):
+        # Enter a node: record it if it is a full schedule, otherwise return its children.
+        tracker = self.tracker
+        tracker.nodes += 1
+        depth = self.total - self.ops_left
+        if depth > tracker.max_depth: tracker.max_depth = depth
+        if tracker.detail: tracker.node(depth)
 
-        if all(j.complete(prog[j.id]) for j in self.jobs):
-            ms = max(timeline)
-            self.tracker.sol += 1
-            if ms < self.best_ms:
-                self.best_ms = ms
-                self.best = copy.deepcopy(sched)
-            return
+        if not self.ops_left:
+            tracker.sol += 1
+            if tracker.hooks: tracker.fire("solution", self.cmax)
+            if self.cmax < self.best_ms:
+                self.best_ms = self.cmax
+                self.best_seq = sched[:]
+                tracker.improved(self.cmax)
+                if self.shared is not None:
+                    with self.shared.get_lock():
+                        if self.cmax < self.shared.value: self.shared.value = self.cmax
+                if self.on_improve is not None:
+                    self.on_improve(self.best_ms, self.assigns(self.best_seq))
+            return None
 
-        ops = self.avail_ops(prog)
+        if tracker.detail:
+            t0 = time.perf_counter()
+            ops = self.avail_ops()
+            tracker.avail_time += time.perf_counter() - t0
+        else:
+            ops = self.avail_ops()
+        if self.branching == "gt":
+            ops = self.active_ops(ops)
         if not ops:
-            self.tracker.pruned += 1
-            return
+            tracker.pruned += 1
+            if tracker.detail: tracker.prune(depth, "dead_end")
+            return None
+        return ops
 
-        for job, op in ops:
-            m = op.mach
-            start = max(timeline[m], job_last_end[job.id])
-            end = start + op.dur
+    def poll(self) -> bool:
+        # Called every POLL_EVERY nodes (sooner when a node limit is near):
+        # pick up the shared incumbent and say whether the search has to stop.
+        nodes = self.tracker.nodes
+        total = self.count_nodes()
+        limit = nodes + self.max_nodes - total if self.max_nodes is not None else None
+        self.poll_at = min(x for x in (nodes + POLL_EVERY, self.split_at, limit) if x is not None)
+        if self.shared is not None and self.shared.value < self.best_ms:
+            self.best_ms = self.shared.value
+        if self.split_at is not None and nodes >= self.split_at:
+            return True
+        self.stop_reason = self.limit_hit(total)
+        return self.stop_reason is not None
+
+    def count_nodes(self) -> int:
+        # Nodes spent so far by the whole search: this Scheduler's own, or in a parallel worker the
+        # shared count of all workers once this one's new nodes are added to it.
+        if self.node_count is None:
+            return self.tracker.nodes
+        with self.node_count.get_lock():
+            self.node_count.value += self.tracker.nodes - self.counted
+            self.counted = self.tracker.nodes
+            return self.node_count.value
+
+    def limit_hit(self, nodes:Optional[int]=None) -> Optional[str]:
+        nodes = self.tracker.nodes if nodes is None else nodes
+        if self.max_nodes is not None and nodes >= self.max_nodes: return "node_limit"
+        if self.deadline_at is not None and time.time() >= self.deadline_at: return "deadline"
+        if self.cancel is not None and self.cancel.is_set(): return "cancelled"
+        return None
 
-            sched.append(Assign(job.id, op.id, m, start, end))
+    def set_limits(self, deadline, max_nodes, cancel, on_improve):
+        self.deadline_at = time.time() + deadline if deadline is not None else None
+        self.max_nodes, self.cancel, self.on_improve = max_nodes, cancel, on_improve
+        self.stop_reason = self.infeasible_bound = None
 
-            old_t = timeline[m]
-            old_j = job_last_end[job.id]
+    def backtrack(self, sched, prog, timeline, job_last_end, lb=(0,0)) -> List[List[int]]:
+        # Depth-first search with an explicit stack instead of one Python frame per op,
+        # so the depth is only limited by memory. Each frame is [children, next child, bound, state key,
+        # discrepancies used to reach it];
+        # `undo` holds (job, op, old machine time, old job end, old cmax) for every op on the current path.
+        # Returns the subtrees left open if poll() stopped the search, as (base, d, jid) tuples from
+        # this state (see open_path); they all share one base list, so a frontier of any size is
+        # handed back in O(frontier + depth) instead of one full path per subtree.
+        self.sync(prog, timeline, job_last_end)
+        self.poll_at = self.tracker.nodes
+        tracker = self.tracker
+        detail = tracker.detail
+        mach_rem, job_rem = self.bounds.mach_rem, self.bounds.job_rem
+        ready = self.ready
+        visit, unplace = self.visit, self.unplace
+        lds = self.discrepancies
+        # a subtree cut short by the discrepancy budget proves nothing, so LDS never stores into the TT
+        tt = self.tt if lds is None else None
+        ops = visit(sched)
+        if ops is None:
+            return []
+        if lds is not None and len(ops) > lds + 1:
+            ops, self.truncated = ops[:lds + 1], True
+        stack = [[ops, 0, lb, self.state_key(prog, timeline, job_last_end) if tt is not None else None, 0]]
+        undo = []
 
+        while stack:
+            if tracker.nodes >= self.poll_at and self.poll():
+                if self.stop_reason is not None:
+                    left = [([], 0, None)]   # stopped by a limit: nothing gets resumed, this whole state counts as open
+                else:
+                    path = [rec[0].id for rec in undo]
+                    left = [(path, d, job.id) for d, f in enumerate(stack) for job, _ in f[0][f[1]:]]
+                while undo:
+                    unplace(undo.pop(), prog, timeline, job_last_end)
+                return left
+            frame = stack[-1]
+            ops, i, plb, key, used = frame
+            if i == len(ops):
+                stack.pop()
+                if tt is not None: tt.put(key, self.best_ms)
+                if undo:
+                    unplace(undo.pop(), prog, timeline, job_last_end)
+                continue
+            frame[1] = i + 1
+
+            job, op = ops[i]
+            jid, m, d = job.id, op.mach, op.dur
+            old_t, old_j = timeline[m], job_last_end[jid]
+            end = (old_t if old_t > old_j else old_j) + d
+            # Placing op only moves its own machine and job terms, and both can only grow,
+            # so the child's bound is the parent's bound raised by those two terms.
+            mlb = end + mach_rem[m] - d
+            if mlb < plb[0]: mlb = plb[0]
+            if mlb >= self.best_ms:
+                tracker.pruned += 1; tracker.pruned_mach += 1
+                if detail: tracker.prune(self.total - self.ops_left + 1, "machine")
+                continue
+            rem = job_rem[jid]
+            jlb = end + rem - d
+            if jlb < plb[1]: jlb = plb[1]
+            if jlb >= self.best_ms:
+                tracker.pruned += 1; tracker.pruned_job += 1
+                if detail: tracker.prune(self.total - self.ops_left + 1, "job")
+                continue
+
+            sched[self.total - self.ops_left] = jid
+            undo.append((job, op, old_t, old_j, self.cmax))
             timeline[m] = end
-            job_last_end[job.id] = end
-            prog[job.id] += 1
+            job_last_end[jid] = end
+            prog[jid] += 1
+            mach_rem[m] -= d
+            job_rem[jid] = rem - d
+            self.ops_left -= 1
+            if end > self.cmax: self.cmax = end
+            del ready[bisect_left(ready, (-rem, -jid))]
+            if rem > d: insort(ready, (d - rem, -jid))
 
-            if max(timeline) < self.best_ms:
-                self.backtrack(sched, prog, timeline, job_last_end)
+            key = None
+            if tt is not None and self.ops_left:
+                key = self.state_key(prog, timeline, job_last_end)
+                v = tt.get(key)
+                if v is not None and v >= self.best_ms:
+                    tracker.tt_hits += 1; tracker.pruned += 1
+                    if detail: tracker.prune(self.total - self.ops_left, "tt")
+                    unplace(undo.pop(), prog, timeline, job_last_end)
+                    continue
+                tracker.tt_misses += 1
+
+            children = visit(sched)
+            if children is None:
+                unplace(undo.pop(), prog, timeline, job_last_end)
             else:
-                self.tracker.pruned += 1
+                used += i
+                if lds is not None and len(children) > lds - used + 1:
+                    children, self.truncated = children[:lds - used + 1], True
+                stack.append([children, 0, (mlb, jlb), key, used])
+        return []
 
-            sched.pop()
-            timeline[m] = old_t
-            job_last_end[job.id] = old_j
-            prog[job.id] -= 1
+    def unplace(self, rec, prog, timeline, job_last_end):
+        job, op, old_t, old_j, old_cmax = rec
+        rem = self.bounds.job_rem[job.id]
+        if rem: del self.ready[bisect_left(self.ready, (-rem, -job.id))]
+        insort(self.ready, (-rem - op.dur, -job.id))
+        self.bounds.unplace(job, op)
+        timeline[op.mach] = old_t
+        job_last_end[job.id] = old_j
+        prog[job.id] -= 1
+        self.ops_left += 1
+        self.cmax = old_cmax
 
-    def solve(self):
+    def solve(self, deadline:Optional[float]=None, max_nodes:Optional[int]=None, cancel=None, on_improve=None,
+              incumbent=None):
+        # Anytime search. It stops cleanly after `deadline` seconds, after `max_nodes` nodes or once
+        # cancel.is_set() (e.g. a threading.Event), and returns the best schedule found so far;
+        # self.optimal tells whether it was proven optimal, self.stop_reason why it stopped early.
+        # on_improve(makespan, schedule) is called every time best_ms improves.
+        # incumbent (makespan or complete schedule, see set_incumbent) is returned unless beaten;
+        # a makespan no schedule reaches is dropped and the search run again without it.
+        self.set_limits(deadline, max_nodes, cancel, on_improve)
+        if incumbent is not None: self.set_incumbent(incumbent)
         self.tracker.start_t()
-        prog = {j.id:0 for j in self.jobs}
-        timeline = [0]*self.machines
-        job_last_end = {j.id:0 for j in self.jobs}
-        self.backtrack([], prog, timeline, job_last_end)
+        while True:
+            sched, prog, timeline, job_last_end = self.replay([])
+            left = self.backtrack(sched, prog, timeline, job_last_end, self.bounds.root(timeline, job_last_end))
+            if not self.unbound(not left) or left:
+                break
+        self.optimal = not left
+        self.settle()
+        self.tracker.end_t()
+        return self.best, self.best_ms
+
+    def solve_lds(self, max_discrepancies:int=3, deadline:Optional[float]=None, max_nodes:Optional[int]=None,
+                  cancel=None, on_improve=None):
+        # Limited discrepancy search: pass k only follows paths that leave the LRPT (or GT) order
+        # at most k times in total, taking the i-th child of a node costing i discrepancies.
+        # Passes share the incumbent; if a pass never had to cut a child the result is optimal.
+        self.set_limits(deadline, max_nodes, cancel, on_improve)
+        self.tracker.start_t()
+        self.optimal = False
+        try:
+            while True:
+                for k in range(max_discrepancies + 1):
+                    self.discrepancies, self.truncated = k, False
+                    sched, prog, timeline, job_last_end = self.replay([])
+                    self.sync(prog, timeline, job_last_end)
+                    if self.backtrack(sched, prog, timeline, job_last_end, self.bounds.root(timeline, job_last_end)):
+                        break
+                    if not self.truncated:
+                        self.optimal = True
+                        break
+                if not self.unbound(self.optimal) or self.stop_reason is not None:
+                    break
+                self.optimal = False
+        finally:
+            self.discrepancies = None
+        self.tracker.end_t()
+        self.settle()
+        return self.best, self.best_ms
+
+    def solve_beam(self, width:int=16):
+        # Beam search: build the schedule one op per level and keep the `width` children with the
+        # lowest (lower bound, LRPT rank) at each level. Not exact, but deterministic and
+        # bounded: O(ops * width * (jobs + machines)) time. A sequence is kept as a parent
+        # pointer (job id, parent) shared by all its children and only rebuilt at the end, so
+        # memory is O(width * (jobs + machines)) for the states plus at most O(width * ops) links.
+        self.tracker.start_t()
+        self.infeasible_bound = None
+        while True:
+            root = Bounds(self.machines, self.jobs)
+            prog = {j.id:0 for j in self.jobs}
+            timeline = [0]*self.machines
+            job_last_end = {j.id:0 for j in self.jobs}
+            beam = [(root.root(timeline, job_last_end), None, prog, timeline, job_last_end, root.mach_rem)]
+            for _ in range(self.total):
+                children = []
+                for lb, seq, prog, timeline, job_last_end, mach_rem in beam:
+                    ops = self.avail_ops(prog)
+                    if self.branching == "gt":
+                        ops = self.active_ops(ops, timeline, job_last_end)
+                    for rank, (job, op) in enumerate(ops):
+                        self.tracker.nodes += 1
+                        end = max(timeline[op.mach], job_last_end[job.id]) + op.dur
+                        clb = (max(lb[0], end + mach_rem[op.mach] - op.dur),
+                               max(lb[1], end + self.suffix[job.id][prog[job.id]] - op.dur))
+                        if max(clb) >= self.best_ms:
+                            self.tracker.pruned += 1
+                            continue
+                        children.append((max(clb), rank, clb, job, op, end, seq, prog, timeline, job_last_end, mach_rem))
+                if not children:
+                    break
+                keep = heapq.nsmallest(width, children, key=lambda c: (c[0], c[1]))
+                self.tracker.pruned += len(children) - len(keep)
+                beam = []
+                # only the survivors get their own copy of the state
+                for _, _, clb, job, op, end, seq, prog, timeline, job_last_end, mach_rem in keep:
+                    prog, timeline, job_last_end, mach_rem = dict(prog), timeline[:], dict(job_last_end), mach_rem[:]
+                    prog[job.id] += 1
+                    timeline[op.mach] = job_last_end[job.id] = end
+                    mach_rem[op.mach] -= op.dur
+                    beam.append((clb, (job.id, seq), prog, timeline, job_last_end, mach_rem))
+            else:
+                for _, seq, _, timeline, _, _ in beam:
+                    self.tracker.sol += 1
+                    if max(timeline, default=0) < self.best_ms:
+                        path = array('i')
+                        while seq is not None:
+                            path.append(seq[0])
+                            seq = seq[1]
+                        path.reverse()
+                        self.best_ms, self.best_seq = max(timeline, default=0), path
+                        self.tracker.improved(self.best_ms)
+            # a makespan-only incumbent that pruned every child: drop it and build the beam again
+            if not self.unbound(False):
+                break
+        self.optimal = False
+        self.tracker.end_t()
+        self.settle()
+        return self.best, self.best_ms
+
+    def solve_subtree(self, path:List[int]) -> List[Tuple[List[int],int,Optional[int]]]:
+        # Search everything below `path`; returns the subtrees left open (see open_path) if it had to stop.
+        sched, prog, timeline, job_last_end = self.replay(path)
+        self.sync(prog, timeline, job_last_end)
+        lb = self.bounds.root(timeline, job_last_end)
+        if max(lb) >= self.best_ms:
+            reason = "machine" if lb[0] >= self.best_ms else "job"
+            self.tracker.pruned += 1
+            if reason == "machine": self.tracker.pruned_mach += 1
+            else: self.tracker.pruned_job += 1
+            if self.tracker.detail: self.tracker.prune(len(path), reason)
+            return []
+        left = self.backtrack(sched, prog, timeline, job_last_end, lb)
+        if not left:
+            return []
+        base = path + left[0][0]   # every subtree left open hangs off the same base
+        return [(base, len(path) + d, jid) for _, d, jid in left]
+
+    def split_top(self, n:int) -> List[List[int]]:
+        # Expand the top levels breadth-first until there are at least n subproblems.
+        paths = [[]]
+        while len(paths) < n:
+            nxt, grew = [], False
+            for p in paths:
+                sched, prog, timeline, job_last_end = self.replay(p)
+                self.sync(prog, timeline, job_last_end)
+                ops = self.avail_ops()
+                if self.branching == "gt" and ops:
+                    ops = self.active_ops(ops)
+                if ops:
+                    nxt.extend(p + [job.id] for job, _ in ops)
+                    grew = True
+                else:
+                    nxt.append(p)
+            if not grew:
+                break
+            paths = nxt
+        return paths
+
+    def solve_parallel(self, workers:Optional[int]=None, split_nodes:int=50_000,
+                       deadline:Optional[float]=None, max_nodes:Optional[int]=None, cancel=None, on_improve=None):
+        # Branch and bound over a process pool. The top of the tree is split into subproblems;
+        # a worker that spends split_nodes nodes on one hands its open subtrees back to be
+        # queued again, so a single deep subtree cannot keep the other workers idle.
+        # All workers prune against one incumbent makespan kept in shared memory.
+        # The limits behave as in solve(): workers check the deadline themselves and add their nodes
+        # to one shared count that max_nodes applies to, plus a shared stop event that the master sets
+        # once any limit trips, so running subproblems end at their next poll. A makespan-only incumbent no schedule reaches is dropped as in solve().
+        unsupported = sorted(e for e, fns in self.tracker.hooks.items() if fns and e != "improve")
+        if unsupported:
+            raise ValueError(f"solve_parallel only fires 'improve' hooks, got {unsupported}")
+        workers = workers or os.cpu_count() or 1
+        self.set_limits(deadline, max_nodes, cancel, on_improve)
+        # worker statistics are merged into a fresh Tracker that keeps the caller's hooks
+        tracker = Tracker(self.tracker.detail)
+        tracker.hooks = self.tracker.hooks
+        self.tracker = tracker
+        self.tracker.start_t()
+        node_count = mp.Value('q', 0)
+        while True:
+            shared = mp.Value('q', self.best_ms)
+            stop = mp.Event()
+            tasks = [(p, len(p), None) for p in reversed(self.split_top(4*workers))]
+            args = (self.machines, self.jobs, self.tt.capacity if self.tt is not None else 0, self.branching, shared,
+                    stop, self.deadline_at, node_count, self.max_nodes, tracker.detail)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=args) as pool:
+                running = set()
+                while tasks or running:
+                    if self.stop_reason is None:
+                        self.stop_reason = self.limit_hit(max(self.tracker.nodes, node_count.value))
+                        if self.stop_reason is not None: stop.set()
+                    while tasks and len(running) < 2*workers and self.stop_reason is None:
+                        running.add(pool.submit(_run_subtree, tasks.pop(), split_nodes))
+                    if not running:
+                        break
+                    done, running = wait(running, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for f in done:
+                        seq, ms, left, wt = f.result()
+                        self.tracker.merge(wt)
+                        if seq is not None and ms < self.best_ms:
+                            self.best_seq, self.best_ms = seq, ms
+                            if self.tracker.hooks: self.tracker.fire("improve", ms)
+                            if self.on_improve is not None:
+                                self.on_improve(self.best_ms, self.assigns(seq))
+                        tasks.extend(reversed(left))
+            if not self.unbound(not tasks) or self.stop_reason is not None:
+                break
+        self.optimal = not tasks
+        self.settle()
         self.tracker.end_t()
         return self.best, self.best_ms
 
 
+# ---------- Parallel workers ----------
+POLL_EVERY = 1024
+_worker: Optional[Scheduler] = None
+
+def _init_worker(machines, jobs, tt_size, branching, shared, stop, deadline_at, node_count, max_nodes, detail):
+    global _worker
+    _worker = Scheduler(machines, jobs, tt_size, branching)
+    _worker.shared = shared
+    # poll() -> limit_hit() stops a subproblem at the deadline, once all workers together have spent
+    # max_nodes or once the master sets `stop`
+    _worker.cancel, _worker.deadline_at = stop, deadline_at
+    _worker.node_count, _worker.max_nodes = node_count, max_nodes
+    _worker.detail = detail
+
+def open_path(task) -> List[int]:
+    # An open subtree (base, d, jid) is the job-id path base[:d] + [jid], or just base[:d] when jid is None.
+    base, d, jid = task
+    return base[:d] if jid is None else base[:d] + [jid]
+
+def _run_subtree(task, split_nodes):
+    s = _worker
+    s.tracker, s.best_seq, s.best_ms = Tracker(s.detail), None, s.shared.value
+    s.split_at, s.stop_reason, s.counted = split_nodes, None, 0
+    left = s.solve_subtree(open_path(task))
+    s.count_nodes()
+    if s.best_seq is None:
+        return None, s.best_ms, left, s.tracker
+    # best_ms may since have dropped to another worker's makespan (poll), so report best_seq's own
+    _, _, timeline, _ = s.replay(s.best_seq)
+    return s.best_seq, max(timeline, default=0), left, s.tracker
+
+
 # ---------- Input ----------
 def get_input():
     M = int(input("Machines count (min 1): "))
@@ -135,20 +756,24 @@ def print_gantt(sol, M, ms):
     print("\nTime 0", " "*(ms-1), ms)
 
 # ---------- Main ----------
+TT_MB = 64   # transposition table budget of the CLI
+
 def main():
     M, jobs = get_input()
-    sched = Scheduler(M, jobs)
+    sched = Scheduler(M, jobs, tt_mb=TT_MB)
+    print("Dispatching-rule incumbent:", sched.seed_rules())
     best, ms = sched.solve()
 
     if best:
-        print("\nBest makespan:", ms)
+        print("\nBest makespan:", ms, "(optimal)" if sched.optimal else f"(not proven optimal: {sched.stop_reason})")
         print_gantt(best, M, ms)
         df = pd.DataFrame([vars(a) for a in best])
         df.to_csv("ops_output.csv", index=False)
         print("\nSaved: ops_output.csv")
 
     t = sched.tracker
-    print(f"\nNodes: {t.nodes} | Pruned: {t.pruned} | Solutions: {t.sol} | Time: {t.elapsed():.4f}s")
+    print(f"\nNodes: {t.nodes} | Pruned: {t.pruned} (machine LB: {t.pruned_mach}, job LB: {t.pruned_job}, TT: {t.tt_hits}) | Solutions: {t.sol} | Time: {t.elapsed():.4f}s | {t.nodes_per_sec():.0f} nodes/s")
+    print(f"TT hit rate: {t.tt_hit_rate():.1%} ({t.tt_hits} hits / {t.tt_misses} misses, {len(sched.tt)} entries)")
 
 if __name__ == "__main__":
     main()
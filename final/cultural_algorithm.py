@@ -1,9 +1,39 @@
 import schedule
-import copy
+import random
+import time
 import operators
+import local_search
+import dispatching
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+import numpy as np
 
 FINAL_POPULATION = 50
 FINAL_GENERATIONS = 100
+FINAL_CROSSOVER_RATE = 1.0
+FINAL_ELITE_RATIO = 0.2
+FINAL_MUTATION_RATE = 0.1
+FITNESS_CACHE_SIZE = 10000
+
+
+#one record per generation from evolve_ca (generation 0 = the initial population)
+@dataclass
+class GenerationRecord:
+    generation: int
+    generations: int
+    best: int               # makespans of this generation
+    average: float
+    worst: int
+    best_so_far: int
+    best_schedule: object = field(repr=False)   # best_schedule_so_far of the belief space
+    diversity: float        # mean share of genes that differ from this generation's best chromosome
+    evaluations: int        # chromosomes decoded so far (cache misses)
+    cache_hits: int
+    evals_per_sec: float    # decodes per second in this generation
+    elapsed: float          # seconds since the start of the run
+    stop_reason: Optional[str] = None   # set on the last record when a stop criterion ended the run
 
 
 def update_belief_space(belief_space, population, fitness_scores):
@@ -12,13 +42,21 @@ def update_belief_space(belief_space, population, fitness_scores):
     
     if current_best_fitness < belief_space['best_fitness_so_far']:
         
-        belief_space['best_fitness_so_far'] = current_best_fitness
         best_index = fitness_scores.index(current_best_fitness)
-        belief_space['best_schedule_so_far'] = copy.deepcopy(population[best_index])
+        set_best_schedule(belief_space, population[best_index], current_best_fitness)
 
 
-def solve_with_ca(jobs_input, num_machines):
-    
+#situational knowledge: the best schedule plus where each operation sits in it.
+#best_positions[first_op[job] + k] = position of the k-th occurrence of job in the best schedule;
+#a stable argsort by job id lists exactly those positions, job by job, in occurrence order
+def set_best_schedule(belief_space, chromosome, fitness):
+    belief_space['best_fitness_so_far'] = fitness
+    belief_space['best_schedule_so_far'] = chromosome   # chromosomes are never changed once in a population
+    belief_space['best_positions'] = np.argsort(chromosome, kind='stable')
+
+
+def create_belief_space(jobs_input):
+
     job_durations = []
     for job_id, operations in enumerate(jobs_input):
         total_time = sum(op[1] for op in operations) # Sum durations of all ops
@@ -31,45 +69,304 @@ def solve_with_ca(jobs_input, num_machines):
     num_critical = max(1, int(len(jobs_input) * 0.2)) 
     critical_jobs_list = [item[0] for item in job_durations[:num_critical]]
 
-    belief_space = {
+    return {
         'best_fitness_so_far': float('inf'),
         'best_schedule_so_far': [],
+        'best_positions': None,
         'critical_jobs': critical_jobs_list
     }
+
+
+#one generation step: keep the best elite_ratio, fill the rest with mutated children of tournament winners.
+#all tournaments and all crossovers of the generation are done at once on the population matrix;
+#children that skip crossover (crossover_rate < 1) are a mutated copy of parent1
+def next_generation(population, fitness_scores, belief_space, crossover_rate=FINAL_CROSSOVER_RATE,
+                    elite_ratio=FINAL_ELITE_RATIO, mutation_rate=FINAL_MUTATION_RATE, rng=None):
+
+    pop_with_scores = list(zip(population, fitness_scores))
+    pop_with_scores.sort(key=lambda x: x[1])
+    num_of_old = int(len(population) * elite_ratio)
+    new_population = [x[0] for x in pop_with_scores[:num_of_old]]
+    remaining_slots = len(population) - num_of_old
+    if remaining_slots == 0:
+        return new_population   # elite_ratio=1.0: the whole population survives as is
+
+    #making new Generation: 2 tournament winners per child, crossover for a crossover_rate share of them
+    batch = operators.batch_rng(rng)
+    matrix = np.stack(population)
+    winners = operators.selection_batch(fitness_scores, 2 * remaining_slots, batch)
+    first, second = winners[:remaining_slots], winners[remaining_slots:]
+    crossed = batch.random(remaining_slots) < crossover_rate
+    children = matrix[first]
+    if crossed.any():
+        children[crossed] = operators.crossover_batch(matrix[first[crossed]], matrix[second[crossed]], batch)
+
+    #small mutation on every child (rows of the fresh children matrix, nobody else holds them),
+    #with the operation number of every gene for situational knowledge (one sort for the whole generation)
+    op_ids = operators.operation_ids(children) if belief_space.get('best_positions') is not None else [None] * remaining_slots
+    for child, child_ops in zip(children, op_ids):
+        operators.mutation(child, belief_space , mutation_rate=mutation_rate, inplace=True, rng=rng, op_ids=child_ops)
+        new_population.append(child)
+
+    return new_population
+
+
+#memetic step: tabu search on the best `count` chromosomes that were not searched before (searched holds
+#their cache keys, so an elite that survives many generations is only improved once).
+#tabu search works on plain (semi-active) schedules, rescore gives the makespan under another decoder
+def improve_elites(population, fitness_scores, tabu, cache, count, max_iter, searched, rescore=None):
+    order = sorted(range(len(population)), key=fitness_scores.__getitem__)
+    for i in order[:count]:
+        key = cache.key(population[i])
+        if key in searched:
+            continue
+        improved, makespan = tabu.run(population[i], max_iter)
+        if rescore is not None:
+            makespan = rescore(improved)
+        searched.add(key)
+        searched.add(cache.key(improved))
+        if makespan < fitness_scores[i]:
+            population[i], fitness_scores[i] = improved, makespan
+            cache.store(improved, makespan)
+
+
+#early stopping, checked after every generation; returns why the run should stop or None
+def stop_reason(belief_space, stale_generations, evaluations, stagnation, target, deadline_at, max_evaluations):
+    if target is not None and belief_space['best_fitness_so_far'] <= target: return "target"
+    if stagnation is not None and stale_generations >= stagnation: return "stagnation"
+    if max_evaluations is not None and evaluations >= max_evaluations: return "max_evaluations"
+    if deadline_at is not None and time.time() >= deadline_at: return "deadline"
+    return None
+
+
+#streaming CA: yields a GenerationRecord after every generation. Stopping the iteration (break, close())
+#stops the run and frees its worker pool.
+#stagnation: generations without a better best, target: makespan that is good enough,
+#deadline: seconds of wall clock, max_evaluations: chromosomes decoded (cache hits are free),
+#tabu_elites: how many of the best chromosomes get a tabu search (tabu_iter iterations) every generation,
+#decoder: "semi-active" (append after the machine's last operation) or "active" (fill idle gaps, schedule.DECODERS),
+#rng: random.Random driving every random choice of the run (default: the global random module),
+#seed_share: part of generation 0 built by the dispatching rules (dispatching.seed_population) instead of at random,
+#migrate: called as migrate(generation, population, fitness_scores, belief_space) after every generation; it may
+#replace chromosomes of the population list in place or adopt a better belief (set_best_schedule), and returns True
+#when it changed the population so it gets scored again (solve_with_ca_islands exchanges migrants through it)
+def evolve_ca(jobs_input, num_machines, workers=1, population_size=FINAL_POPULATION, generations=FINAL_GENERATIONS,
+              elite_ratio=FINAL_ELITE_RATIO, mutation_rate=FINAL_MUTATION_RATE, crossover_rate=FINAL_CROSSOVER_RATE,
+              stagnation=None, target=None, deadline=None, max_evaluations=None,
+              tabu_elites=0, tabu_iter=100, decoder="semi-active", rng=None, seed_share=0.0, migrate=None):
+
+    started = time.time()
+    deadline_at = started + deadline if deadline is not None else None
+    belief_space = create_belief_space(jobs_input)
     
-    #making 50 random schedules[Gen 0]
-    population = [schedule.create_random_schedule(jobs_input) for _ in range(FINAL_POPULATION)] 
+    #making schedules[Gen 0]: seed_share of them from dispatching rules, the rest random
+    seeded = min(population_size, int(round(population_size * seed_share)))
+    population = dispatching.seed_population(jobs_input, seeded, rng)
+    population += [schedule.create_random_schedule(jobs_input, rng) for _ in range(population_size - seeded)] 
 
-    #getting fitness score for each schedule
-    fitness_scores = [schedule.calculate_fitness(s , jobs_input , num_machines) for s in population] 
+    #getting fitness score for each schedule (whole population decoded at once)
+    tables = schedule.build_tables(jobs_input)
+    #workers > 1: cache misses are decoded by a process pool reading the population from shared memory
+    evaluator = schedule.ParallelEvaluator(jobs_input, num_machines, workers, population_size, decoder) if workers > 1 else None
+    cache = schedule.FitnessCache(FITNESS_CACHE_SIZE, evaluator or schedule.BATCH_DECODERS[decoder])
+    tabu = local_search.TabuSearch(jobs_input, num_machines, rng=rng) if tabu_elites else None
+    rescore = None if decoder == "semi-active" else lambda c: schedule.calculate_fitness_active(c, jobs_input, num_machines)
+    searched = set()
 
-    for gen in range(FINAL_GENERATIONS):
+    def record(gen, gen_started, evaluations_before, reason=None):
+        best_index = fitness_scores.index(min(fitness_scores))
+        diversity = float((np.stack(population) != population[best_index]).mean())
+        spent = time.time() - gen_started
+        return GenerationRecord(
+            generation=gen, generations=generations,
+            best=fitness_scores[best_index], average=sum(fitness_scores) / len(fitness_scores), worst=max(fitness_scores),
+            best_so_far=belief_space['best_fitness_so_far'], best_schedule=belief_space['best_schedule_so_far'],
+            diversity=diversity, evaluations=cache.misses, cache_hits=cache.hits,
+            evals_per_sec=(cache.misses - evaluations_before) / spent if spent > 0 else 0.0,
+            elapsed=time.time() - started, stop_reason=reason)
 
+    try:
+        fitness_scores = cache.evaluate(population, jobs_input, num_machines, tables)
+        if tabu is not None:
+            improve_elites(population, fitness_scores, tabu, cache, tabu_elites, tabu_iter, searched, rescore)
         update_belief_space(belief_space, population, fitness_scores)
+        stale = 0
+        yield record(0, started, 0)
+
+        for gen in range(generations):
+
+            gen_started, evaluations_before = time.time(), cache.misses
+            population = next_generation(population, fitness_scores, belief_space,
+                                         crossover_rate, elite_ratio, mutation_rate, rng)
+            fitness_scores = cache.evaluate(population, jobs_input, num_machines, tables)
+            if tabu is not None:
+                improve_elites(population, fitness_scores, tabu, cache, tabu_elites, tabu_iter, searched, rescore)
+            before = belief_space['best_fitness_so_far']
+            update_belief_space(belief_space, population, fitness_scores)
+            if migrate is not None and migrate(gen + 1, population, fitness_scores, belief_space):
+                fitness_scores = cache.evaluate(population, jobs_input, num_machines, tables)
+                update_belief_space(belief_space, population, fitness_scores)
+            stale = 0 if belief_space['best_fitness_so_far'] < before else stale + 1
+
+            reason = stop_reason(belief_space, stale, cache.misses, stagnation, target, deadline_at, max_evaluations)
+            yield record(gen + 1, gen_started, evaluations_before, reason)
+            if reason is not None:
+                return
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+
+
+#stdout consumer of evolve_ca: the old progress lines, returns the last record
+def print_progress(records, every=10):
+    last = None
+    for last in records:
+        if last.generation > 0 and last.generation % every == 0:
+            print(f"Generation {last.generation}/{last.generations}: Best Fitness = {last.best_so_far}")
+        if last.stop_reason is not None:
+            print(f"Stopped after generation {last.generation}/{last.generations}: {last.stop_reason}")
+    return last
+
+
+#same arguments as evolve_ca, runs to the end and returns (best schedule, best makespan)
+def solve_with_ca(jobs_input, num_machines, verbose=True, **kwargs):
+    records = evolve_ca(jobs_input, num_machines, **kwargs)
+    if verbose:
+        last = print_progress(records)
+    else:
+        for last in records:
+            pass
+
+    if verbose:
+        print("--- Evolution Finished ---")
+        print(f"Final Best Fitness (Makespan): {last.best_so_far}")
+        print(f"Final Best Schedule (Priority): {last.best_schedule.tolist()}")
+        print(f"Fitness cache: {last.cache_hits} hits / {last.evaluations} misses "
+              f"({last.cache_hits / max(1, last.cache_hits + last.evaluations):.1%}), {last.elapsed:.2f}s")
+    return last.best_schedule, last.best_so_far
+
+
+#island model: every island is a full CA (evolve_ca, own population + belief space) in its own process.
+#every `interval` generations each island sends its best chromosomes w its best_schedule_so_far to one
+#neighbour and receives exactly one message back, so nobody ever waits on a message that is not coming
+def migration_targets(islands, topology, seed, epoch):
+    if topology == "ring":
+        return [(i + 1) % islands for i in range(islands)]
+    if topology == "random":
+        # every island draws the same permutation for this epoch (shared seed), so each inbox gets one message
+        targets = list(range(islands))
+        random.Random(seed * 100003 + epoch).shuffle(targets)
+        return targets
+    raise ValueError(f"unknown topology {topology!r}")
+
+def _run_island(idx, jobs_input, num_machines, generations, interval, migrants, topology, seed, inboxes, results, kwargs):
+    state = {'epoch': 0, 'received_better': 0}
+
+    def exchange(epoch, population, fitness_scores, belief_space):
+        order = sorted(range(len(population)), key=fitness_scores.__getitem__)
+        best = [population[i] for i in order[:migrants]]
+        target = migration_targets(len(inboxes), topology, seed, epoch)[idx]
+        inboxes[target].put((best, belief_space['best_schedule_so_far'], belief_space['best_fitness_so_far']))
+
+        incoming, their_best, their_fitness = inboxes[idx].get()
+        # migrants replace the worst chromosomes, a better belief is adopted as is
+        for slot, chromosome in zip(reversed(order), incoming):
+            population[slot] = chromosome
+        if their_fitness < belief_space['best_fitness_so_far']:
+            set_best_schedule(belief_space, their_best, their_fitness)
+            state['received_better'] += 1
+        state['epoch'] = epoch
+
+    def migrate(gen, population, fitness_scores, belief_space):
+        state['last'] = (population, fitness_scores, belief_space)
+        if gen % interval or gen >= generations:
+            return False
+        exchange(gen // interval, population, fitness_scores, belief_space)
+        return True
+
+    records = list(evolve_ca(jobs_input, num_machines, generations=generations, rng=random.Random(seed + idx),
+                             migrate=migrate, **kwargs))
+    # an island stopped early (stagnation, target, deadline ...) still takes part in the remaining exchanges,
+    # the other islands wait on its messages
+    for epoch in range(state['epoch'] + 1, (generations - 1) // interval + 1):
+        exchange(epoch, *state['last'])
+
+    last = records[-1]
+    results.put({
+        'island': idx,
+        'best_fitness': last.best_so_far,
+        'best_schedule': last.best_schedule,
+        'history': [r.best_so_far for r in records[1:]],
+        'records': records,
+        'stop_reason': last.stop_reason,
+        'evaluations': last.evaluations,
+        'cache_hits': last.cache_hits,
+        'received_better': state['received_better'],
+    })
+
+#kwargs: any other evolve_ca argument (population_size, decoder, tabu_elites, seed_share, stagnation ...),
+#used by every island; island i draws from random.Random(seed + i)
+def solve_with_ca_islands(jobs_input, num_machines, islands=4, interval=10, migrants=2, topology="ring", seed=None,
+                          generations=FINAL_GENERATIONS, **kwargs):
+    migration_targets(islands, topology, 0, 0)   # reject an unknown topology before starting processes
+    if seed is None:
+        seed = random.randrange(1 << 30)
+
+    inboxes = [mp.Queue() for _ in range(islands)]
+    results = mp.Queue()
+    procs = [mp.Process(target=_run_island,
+                        args=(i, jobs_input, num_machines, generations, interval, migrants, topology, seed, inboxes, results, kwargs))
+             for i in range(islands)]
+    for p in procs:
+        p.start()
+    stats = sorted((results.get() for _ in procs), key=lambda st: st['island'])
+    for p in procs:
+        p.join()
+
+    print(f"--- Island Evolution Finished ({islands} islands, {topology}, migration every {interval} gens) ---")
+    for st in stats:
+        print(f"Island {st['island']}: Best Fitness = {st['best_fitness']}, "
+              f"evaluations = {st['evaluations']}, cache hits = {st['cache_hits']}, "
+              f"better beliefs received = {st['received_better']}"
+              + (f", stopped: {st['stop_reason']}" if st['stop_reason'] else ""))
+    best = min(stats, key=lambda st: st['best_fitness'])
+    print(f"Final Best Fitness (Makespan): {best['best_fitness']} (island {best['island']})")
+    return best['best_schedule'], best['best_fitness'], stats
+
+
+#multi-start: one independent run per seed, spread over a process pool. every run only depends on its own
+#seed (random.Random(seed)), so the results are the same whatever the number of workers
+#(unless a wall-clock deadline cuts a run short)
+def _run_seed(seed, jobs_input, num_machines, kwargs):
+    best_schedule, best_fitness = solve_with_ca(jobs_input, num_machines, rng=random.Random(seed), verbose=False, **kwargs)
+    return seed, best_schedule, best_fitness
+
+def solve_multi_start(jobs_input, num_machines, seeds=8, workers=None, **kwargs):
+    seeds = list(range(seeds)) if isinstance(seeds, int) else list(seeds)
+    if workers == 1:
+        runs = [_run_seed(seed, jobs_input, num_machines, kwargs) for seed in seeds]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            runs = list(pool.map(_run_seed, seeds, [jobs_input] * len(seeds), [num_machines] * len(seeds), [kwargs] * len(seeds)))
+
+    fitness = np.array([f for _, _, f in runs])
+    best_seed, best_schedule, best_fitness = min(runs, key=lambda run: (run[2], seeds.index(run[0])))
+    stats = {
+        'seeds': seeds,
+        'fitness': fitness.tolist(),
+        'best_seed': best_seed,
+        'min': int(fitness.min()),
+        'max': int(fitness.max()),
+        'mean': float(fitness.mean()),
+        'std': float(fitness.std()),
+        'median': float(np.median(fitness)),
+    }
+    print(f"--- Multi-start Finished ({len(seeds)} seeds) ---")
+    print(f"Makespan min {stats['min']} / median {stats['median']} / mean {stats['mean']:.1f} / max {stats['max']} (std {stats['std']:.1f})")
+    print(f"Final Best Fitness (Makespan): {best_fitness} (seed {best_seed})")
+    return best_schedule, best_fitness, stats
+
 
-        pop_with_scores = list(zip(population, fitness_scores))
-        pop_with_scores.sort(key=lambda x: x[1])
-        num_of_old = int(FINAL_POPULATION * 0.2)
-        new_population = [x[0] for x in pop_with_scores[:num_of_old]]
-        remaining_slots = FINAL_POPULATION - num_of_old
-
-        #making new Generation
-        for _ in range(remaining_slots):
-
-            #select 2 parents make a crossover and small mutation and put it in new population
-            parent1 = operators.selection(population, fitness_scores)
-            parent2 = operators.selection(population, fitness_scores)
-            child = operators.crossover(parent1, parent2)
-            child = operators.mutation(child, belief_space , mutation_rate=0.1)
-
-            new_population.append(child)
-
-        population = new_population
-        fitness_scores = [schedule.calculate_fitness(s, jobs_input, num_machines) for s in population]
-        if (gen + 1) % 10 == 0:
-            print(f"Generation {gen + 1}/{FINAL_GENERATIONS}: Best Fitness = {belief_space['best_fitness_so_far']}")
-            
-    print("--- Evolution Finished ---")
-    print(f"Final Best Fitness (Makespan): {belief_space['best_fitness_so_far']}")
-    print(f"Final Best Schedule (Priority): {belief_space['best_schedule_so_far']}")
-    return belief_space['best_schedule_so_far'], belief_space['best_fitness_so_far']
+if __name__ == "__main__":
+    jobs_input = [[(0, 2), (1, 4), (2, 3), (3, 1)], [(1, 3), (0, 2), (1, 1), (3, 3)], [(0, 3), (2, 2), (1, 3), (0, 1)]]
+    best_schedule, best_fitness = solve_with_ca(jobs_input, 4, rng=random.Random(0))
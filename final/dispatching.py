@@ -0,0 +1,131 @@
+import heapq
+import random
+import numpy as np
+import schedule
+
+#dispatching rules inside a schedule generation scheme: ops are placed one at a time at their earliest start
+#(after the job's previous op and the machine's last op), the rule only chooses among the ops that may go next:
+#   "active"    - Giffler-Thompson: the machine of the op that can finish first, every op on it that can start
+#                 before that finish time (the conflict set) is a candidate
+#   "non-delay" - the ops that can start the earliest are the candidates, no machine is left idle for a later op
+#rules (smaller key wins among the candidates):
+#   SPT  - shortest processing time of the operation first
+#   LPT  - longest processing time of the operation first
+#   MWKR - most work remaining after the operation first
+#   LRPT - longest remaining processing time (operation included) first, the backtracking order
+#   MOR  - most operations remaining first
+RULES = ("SPT", "LPT", "MWKR", "LRPT", "MOR")
+SCHEMES = ("non-delay", "active")
+
+
+def _key(rule, duration, work_left, ops_left):
+    # smaller key = dispatched first; work_left / ops_left include the operation itself
+    if rule == "SPT": return duration
+    if rule == "LPT": return -duration
+    if rule == "MWKR": return duration - work_left
+    if rule == "LRPT": return -work_left
+    if rule == "MOR": return -ops_left
+    raise ValueError(f"unknown dispatching rule {rule!r}")
+
+#one chromosome from one rule, the ops in the order they are placed; noise > 0 scales every key by a random
+#factor in [1, 1 + noise] (ties broken at random too) so the same rule gives different, still rule-like, schedules.
+#the next op of every unfinished job waits in a heap keyed by (earliest start or finish, rule key); start times
+#only grow, so an entry found out of date at the top is pushed back with its new time: O(n log jobs) for
+#"non-delay", plus a scan of the chosen machine's waiting jobs per op for "active"
+def dispatch(jobs_input, rule, noise=0.0, rng=None, scheme="non-delay"):
+    _key(rule, 0, 0, 0)   # reject an unknown rule or scheme before doing any work
+    if scheme not in SCHEMES:
+        raise ValueError(f"unknown schedule generation scheme {scheme!r}")
+    rng = rng or random
+    suffix = []
+    for job_operations in jobs_input:
+        work = [0] * (len(job_operations) + 1)
+        for k in range(len(job_operations) - 1, -1, -1):
+            work[k] = work[k + 1] + job_operations[k][1]
+        suffix.append(work)
+
+    def priority(job_id, k):
+        key = _key(rule, jobs_input[job_id][k][1], suffix[job_id][k], len(jobs_input[job_id]) - k)
+        if noise:
+            return (key * (1 + noise * rng.random()), rng.random())
+        return (key, job_id)
+
+    num_machines = 1 + max((m for job_operations in jobs_input for m, _ in job_operations), default=-1)
+    machine_ready = [0] * num_machines
+    job_ready = [0] * len(jobs_input)
+    finish = scheme == "active"   # heap time: earliest finish for "active", earliest start for "non-delay"
+    waiting = [set() for _ in range(num_machines)]   # jobs whose next op runs on the machine
+    counters = [0] * len(jobs_input)
+    prio = [None] * len(jobs_input)
+
+    def time_of(job_id):
+        machine_id, duration = jobs_input[job_id][counters[job_id]]
+        start = max(machine_ready[machine_id], job_ready[job_id])
+        return start + duration if finish else start
+
+    def push(job_id):
+        prio[job_id] = priority(job_id, counters[job_id])
+        waiting[jobs_input[job_id][counters[job_id]][0]].add(job_id)
+        heapq.heappush(heap, (time_of(job_id), prio[job_id], job_id, counters[job_id]))
+
+    heap = []
+    for job_id, job_operations in enumerate(jobs_input):
+        if job_operations:
+            push(job_id)
+    chromosome = []
+    while heap:
+        t, _, job_id, k = heap[0]
+        if k != counters[job_id]:
+            heapq.heappop(heap)   # that op was placed by the "active" scheme from the conflict set
+            continue
+        now = time_of(job_id)
+        if now != t:
+            heapq.heapreplace(heap, (now, prio[job_id], job_id, k))
+            continue
+        machine_id = jobs_input[job_id][k][0]
+        if finish:
+            # conflict set: the ops on this machine that can start before the earliest finish
+            job_id = min((j for j in waiting[machine_id]
+                          if max(machine_ready[machine_id], job_ready[j]) < t), key=prio.__getitem__)
+        else:
+            heapq.heappop(heap)
+        duration = jobs_input[job_id][counters[job_id]][1]
+        end = max(machine_ready[machine_id], job_ready[job_id]) + duration
+        machine_ready[machine_id] = job_ready[job_id] = end
+        waiting[machine_id].discard(job_id)
+        chromosome.append(job_id)
+        counters[job_id] += 1
+        if counters[job_id] < len(jobs_input[job_id]):
+            push(job_id)
+    return np.array(chromosome, dtype=schedule.gene_type(len(jobs_input)))
+
+#standalone solver: every rule once in every scheme, the best schedule wins -> (chromosome, makespan, rule)
+def solve_with_rules(jobs_input, num_machines, rules=RULES, decoder="semi-active", schemes=SCHEMES):
+    decode = schedule.DECODERS[decoder]
+    results = []
+    for scheme in schemes:
+        for rule in rules:
+            chromosome = dispatch(jobs_input, rule, scheme=scheme)
+            makespan = max(end for _, _, _, _, end in decode(chromosome, jobs_input, num_machines))
+            results.append((makespan, rule, chromosome))
+    makespan, rule, chromosome = min(results, key=lambda r: r[0])
+    return chromosome, makespan, rule
+
+#population seeding: each (rule, scheme) once as is, then noisy variants of them in turn
+def seed_population(jobs_input, count, rng=None, rules=RULES, noise=0.2, schemes=SCHEMES):
+    combos = [(rule, scheme) for scheme in schemes for rule in rules]
+    population = []
+    for i in range(count):
+        rule, scheme = combos[i % len(combos)]
+        population.append(dispatch(jobs_input, rule, noise if i >= len(combos) else 0.0, rng, scheme))
+    return population
+
+
+if __name__ == "__main__":
+    jobs_input = [[(0, 2), (1, 4), (2, 3), (3, 1)], [(1, 3), (0, 2), (1, 1), (3, 3)], [(0, 3), (2, 2), (1, 3), (0, 1)]]
+    for scheme in SCHEMES:
+        for rule in RULES:
+            chromosome = dispatch(jobs_input, rule, scheme=scheme)
+            print(f"{scheme:9s} {rule:5s} makespan {schedule.calculate_fitness(chromosome, jobs_input, 4)} {chromosome.tolist()}")
+    chromosome, makespan, rule = solve_with_rules(jobs_input, 4)
+    print(f"Best rule: {rule} (makespan {makespan})")
@@ -0,0 +1,226 @@
+import random
+import numpy as np
+import schedule
+
+#tabu search on the disjunctive graph of a decoded chromosome (used alone or on the elites of solve_with_ca).
+#operations are numbered job by job (op k of job j = first_op[j] + k), every machine keeps the order its
+#operations run in; head = longest path before an operation starts, tail = longest path after it ends.
+
+
+class TabuSearch:
+    def __init__(self, jobs_input, num_machines, neighbourhood="n7", tenure=10, rng=None):
+        if neighbourhood not in ("n5", "n7"):
+            raise ValueError(f"unknown neighbourhood {neighbourhood!r}")
+        self.jobs_input = jobs_input
+        self.num_machines = num_machines
+        self.neighbourhood = neighbourhood
+        self.tenure = tenure
+        self.rng = rng or random   # breaks ties between moves with the same estimate
+
+        self.machine, self.duration, self.job = [], [], []
+        self.job_prev, self.job_next = [], []
+        for job_id, job_operations in enumerate(jobs_input):
+            first = len(self.machine)
+            for k, (machine_id, duration) in enumerate(job_operations):
+                self.machine.append(machine_id)
+                self.duration.append(duration)
+                self.job.append(job_id)
+                self.job_prev.append(first + k - 1 if k > 0 else -1)
+                self.job_next.append(first + k + 1 if k + 1 < len(job_operations) else -1)
+        self.first_op = [0] * len(jobs_input)
+        for v in range(len(self.job) - 1, -1, -1):
+            self.first_op[self.job[v]] = v
+        self.num_ops = len(self.machine)
+
+    #chromosome -> operation order on every machine (same decoding as calculate_fitness)
+    def decode(self, chromosome):
+        sequences = [[] for _ in range(self.num_machines)]
+        counters = [0] * len(self.jobs_input)
+        for job_id in chromosome:
+            v = self.first_op[job_id] + counters[job_id]
+            counters[job_id] += 1
+            sequences[self.machine[v]].append(v)
+        return sequences
+
+    #heads, tails, makespan and a topological order of the graph; None if the machine orders make a cycle
+    def evaluate(self, sequences):
+        n = self.num_ops
+        dur, job_prev, job_next = self.duration, self.job_prev, self.job_next
+        mach_prev, mach_next = [-1] * n, [-1] * n
+        for seq in sequences:
+            for a, b in zip(seq, seq[1:]):
+                mach_next[a] = b
+                mach_prev[b] = a
+
+        indegree = [(job_prev[v] != -1) + (mach_prev[v] != -1) for v in range(n)]
+        ready = [v for v in range(n) if indegree[v] == 0]
+        order = []
+        head = [0] * n
+        while ready:
+            v = ready.pop()
+            order.append(v)
+            end = head[v] + dur[v]
+            for w in (job_next[v], mach_next[v]):
+                if w != -1:
+                    if end > head[w]:
+                        head[w] = end
+                    indegree[w] -= 1
+                    if indegree[w] == 0:
+                        ready.append(w)
+        if len(order) < n:
+            return None
+
+        tail = [0] * n
+        for v in reversed(order):
+            for w in (job_next[v], mach_next[v]):
+                if w != -1 and tail[w] + dur[w] > tail[v]:
+                    tail[v] = tail[w] + dur[w]
+        makespan = max(head[v] + dur[v] for v in range(n))
+        return head, tail, makespan, order, mach_prev, mach_next
+
+    #one critical path cut into blocks: maximal runs of critical operations back to back on one machine
+    def critical_blocks(self, head, tail, makespan, mach_next):
+        dur, job_next = self.duration, self.job_next
+        critical = lambda v: v != -1 and head[v] + dur[v] + tail[v] == makespan
+        v = next(v for v in range(self.num_ops) if head[v] == 0 and critical(v))
+        blocks = [[v]]
+        while True:
+            end = head[v] + dur[v]
+            w = mach_next[v]
+            if critical(w) and head[w] == end:
+                blocks[-1].append(w)
+            else:
+                w = job_next[v]
+                if not (critical(w) and head[w] == end):
+                    break
+                blocks.append([w])
+            v = w
+        return [block for block in blocks if len(block) > 1], blocks[0], blocks[-1]
+
+    #candidate moves as (machine, first index, new order of the block): N5 swaps the first two / last two
+    #operations of a block (not at the start of the first block / end of the last one), N7 also moves any
+    #operation of a block to its front or its back
+    def moves(self, blocks, first_block, last_block, position):
+        found = {}   # dict as an ordered set: a swap of a block of two is both a front and a back move
+        for block in blocks:
+            machine_id, start, k = self.machine[block[0]], position[block[0]], len(block)
+            if self.neighbourhood == "n5":
+                if block is not first_block:
+                    found[(machine_id, start, tuple([block[1], block[0]] + block[2:]))] = None
+                if block is not last_block:
+                    found[(machine_id, start, tuple(block[:-2] + [block[-1], block[-2]]))] = None
+            else:
+                for i in range(1, k):
+                    found[(machine_id, start, tuple([block[i]] + block[:i] + block[i + 1:]))] = None
+                for i in range(k - 1):
+                    found[(machine_id, start, tuple(block[:i] + block[i + 1:] + [block[i]]))] = None
+        return list(found)
+
+    #makespan estimate of a move from the current heads and tails, no decoding: the moved block is
+    #re-timed forward (heads) from its machine predecessor and backward (tails) from its machine successor
+    def estimate(self, move, sequences, head, tail):
+        machine_id, start, new = move
+        seq = sequences[machine_id]
+        dur, job_prev, job_next = self.duration, self.job_prev, self.job_next
+        before = seq[start - 1] if start > 0 else -1
+        after = seq[start + len(new)] if start + len(new) < len(seq) else -1
+
+        new_head = []
+        ready = head[before] + dur[before] if before != -1 else 0
+        for w in new:
+            p = job_prev[w]
+            h = head[p] + dur[p] if p != -1 else 0
+            h = h if h > ready else ready
+            new_head.append(h)
+            ready = h + dur[w]
+
+        best = 0
+        done = tail[after] + dur[after] if after != -1 else 0
+        for w, h in zip(reversed(new), reversed(new_head)):
+            s = job_next[w]
+            t = tail[s] + dur[s] if s != -1 else 0
+            t = t if t > done else done
+            done = t + dur[w]
+            if h + dur[w] + t > best:
+                best = h + dur[w] + t
+        return best
+
+    @staticmethod
+    def swapped_pairs(old, new):
+        # pairs (a, b) with a before b in the old order and b before a in the new one
+        rank = {v: i for i, v in enumerate(new)}
+        return [(a, b) for i, a in enumerate(old) for b in old[i + 1:] if rank[a] > rank[b]]
+
+    #machine orders -> chromosome: operations by start time (ties by topological order) decode back to
+    #exactly these machine orders
+    def to_chromosome(self, head, order):
+        rank = [0] * self.num_ops
+        for i, v in enumerate(order):
+            rank[v] = i
+        ops = sorted(range(self.num_ops), key=lambda v: (head[v], rank[v]))
+        return np.array([self.job[v] for v in ops], dtype=schedule.gene_type(len(self.jobs_input)))
+
+    def run(self, chromosome, max_iter=200, max_stale=50):
+        sequences = self.decode(chromosome)
+        state = self.evaluate(sequences)
+        best_state = state
+        best_makespan = state[2]
+        tabu = {}   # (a, b) -> last iteration at which putting a before b again is forbidden
+        stale = 0
+
+        for it in range(max_iter):
+            head, tail, makespan, _, _, mach_next = state
+            blocks, first_block, last_block = self.critical_blocks(head, tail, makespan, mach_next)
+            position = {}
+            for seq in sequences:
+                for i, v in enumerate(seq):
+                    position[v] = i
+            candidates = []
+            for move in self.moves(blocks, first_block, last_block, position):
+                machine_id, start, new = move
+                old = sequences[machine_id][start:start + len(new)]
+                pairs = self.swapped_pairs(old, new)
+                est = self.estimate(move, sequences, head, tail)
+                is_tabu = any(tabu.get((b, a), -1) >= it for a, b in pairs)
+                if is_tabu and est >= best_makespan:   # aspiration: a tabu move that beats the best is allowed
+                    continue
+                candidates.append((est, self.rng.random(), move, pairs))
+            if not candidates:
+                break   # no critical block to work on (optimal) or every move is tabu
+
+            candidates.sort(key=lambda c: (c[0], c[1]))
+            for est, _, (machine_id, start, new), pairs in candidates:
+                seq = sequences[machine_id]
+                old = seq[start:start + len(new)]
+                seq[start:start + len(new)] = new
+                moved = self.evaluate(sequences)
+                if moved is not None:
+                    break
+                seq[start:start + len(new)] = old   # the move closes a cycle, try the next one
+            else:
+                break
+            state = moved
+            for a, b in pairs:
+                tabu[(a, b)] = it + self.tenure
+
+            if state[2] < best_makespan:
+                best_makespan, best_state = state[2], state
+                stale = 0
+            else:
+                stale += 1
+                if stale >= max_stale:
+                    break
+
+        return self.to_chromosome(best_state[0], best_state[3]), best_makespan
+
+
+def tabu_search(chromosome, jobs_input, num_machines, max_iter=200, max_stale=50, neighbourhood="n7", tenure=10, rng=None):
+    return TabuSearch(jobs_input, num_machines, neighbourhood, tenure, rng).run(chromosome, max_iter, max_stale)
+
+
+if __name__ == "__main__":
+    jobs_input = [[(0, 2), (1, 4), (2, 3), (3, 1)], [(1, 3), (0, 2), (1, 1), (3, 3)], [(0, 3), (2, 2), (1, 3), (0, 1)]]
+    chromosome = schedule.create_random_schedule(jobs_input)
+    print(f"Random schedule: makespan {schedule.calculate_fitness(chromosome, jobs_input, 4)}")
+    improved, makespan = tabu_search(chromosome, jobs_input, 4)
+    print(f"After tabu search: makespan {makespan} {improved.tolist()}")
@@ -1,11 +1,12 @@
 import random
-import copy
-from collections import Counter
+import numpy as np
 
-def selection(population, fitness_scores):
+#every operator takes an optional rng (a random.Random); without one it draws from the global random module
+def selection(population, fitness_scores, rng=None):
+    rng = rng or random
     
-    idx1 = random.randint(0, len(population) - 1)
-    idx2 = random.randint(0, len(population) - 1)
+    idx1 = rng.randint(0, len(population) - 1)
+    idx2 = rng.randint(0, len(population) - 1)
     
     if fitness_scores[idx1] < fitness_scores[idx2]:
         # Return the chromosome (the list) of the winner
@@ -14,86 +15,141 @@ def selection(population, fitness_scores):
         return population[idx2]
 
 
-def crossover(parent1_chromosome, parent2_chromosome):
+#vectorized versions for a whole generation: the numpy generator is seeded from the run's rng,
+#so the same seed still fixes a run
+def batch_rng(rng=None):
+    return np.random.default_rng((rng or random).getrandbits(64))
+
+
+#all tournaments of a generation in one draw: indices of the `count` winners of binary tournaments
+def selection_batch(fitness_scores, count, rng):
+    fitness = np.asarray(fitness_scores)
+    pairs = rng.integers(0, len(fitness), size=(count, 2))
+    return np.where(fitness[pairs[:, 0]] < fitness[pairs[:, 1]], pairs[:, 0], pairs[:, 1])
+
+
+#crossover() for every row of two parent matrices at once, one child matrix out
+def crossover_batch(parents1, parents2, rng):
+    rows, size = parents1.shape
+    if rows == 0:
+        return parents1.copy()   # nothing to cross (no row drew crossover this generation)
+    rows_idx = np.arange(rows)[:, None]
+    positions = np.arange(size)
+
+    # 1. two different random cut-off points per row
+    a = rng.integers(0, size, rows)
+    b = rng.integers(0, size - 1, rows)
+    b += b >= a
+    start, end = np.minimum(a, b)[:, None], np.maximum(a, b)[:, None]
+    in_chunk = (positions >= start) & (positions < end)
+
+    # 2. the chunk of parent 1 goes to the same place in the child
+    children = np.empty_like(parents1)
+    children[in_chunk] = parents1[in_chunk]
+
+    # 3. count the items of every chunk (one bincount over row-offset job ids)
+    num_jobs = int(parents1.max()) + 1
+    flat = (parents1 + rows_idx * num_jobs)[in_chunk]
+    chunk_item_counts = np.bincount(flat, minlength=rows * num_jobs).reshape(rows, num_jobs)
+
+    # 4. occurrence number of every gene of parent 2 inside its row (stable sort, distance to its group start)
+    order = np.argsort(parents2, axis=1, kind='stable')
+    sorted_jobs = np.take_along_axis(parents2, order, axis=1)
+    new_group = np.ones((rows, size), dtype=bool)
+    new_group[:, 1:] = sorted_jobs[:, 1:] != sorted_jobs[:, :-1]
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0), axis=1)
+    occurrence = np.empty((rows, size), dtype=np.intp)
+    np.put_along_axis(occurrence, order, positions - group_start, axis=1)
+    keep = occurrence >= chunk_item_counts[rows_idx, parents2]
+
+    # 5. fill the gaps in parent 2 order: row by row the kept genes and the free slots line up
+    children[~in_chunk] = parents2[keep]
+    return children
+
+
+#operation number of every gene (op k of job j = first_op[j] + k), every row at once: a stable sort by job id
+#puts op k of job j on position first_op[j] + k, so sorting the sort order back numbers the genes
+def operation_ids(matrix):
+    matrix = np.atleast_2d(matrix)
+    order = np.argsort(matrix, axis=1, kind='stable')
+    op_ids = np.empty_like(order)
+    np.put_along_axis(op_ids, order, np.arange(matrix.shape[1]), axis=1)
+    return op_ids
+
+
+#chromosomes are flat numpy arrays of job ids (schedule.gene_type), the child is the only buffer allocated here
+def crossover(parent1_chromosome, parent2_chromosome, rng=None):
+    rng = rng or random
     
-    p1 = copy.deepcopy(parent1_chromosome)
-    p2 = copy.deepcopy(parent2_chromosome)
+    p1 = parent1_chromosome
+    p2 = parent2_chromosome
     size = len(p1)
 
     # 1. Pick two random cut-off points
-    start, end = sorted(random.sample(range(size), 2))
+    start, end = sorted(rng.sample(range(size), 2))
 
-    # 2. Create the child, starting as a list of 'None'
-    child = [None] * size
-
-    # 3. Copy the "chunk" from parent 1 directly to the child
+    # 2. Create the child and copy the "chunk" from parent 1 directly into it
+    child = np.empty_like(p1)
     chunk = p1[start:end]
     child[start:end] = chunk
     
-    # 4. Count the items in the chunk
-    chunk_item_counts = Counter(chunk)
-    
-    # 5. Get the list of items to add from Parent 2
-    p2_items_to_add = []
-    for item in p2:
-        if item in chunk_item_counts and chunk_item_counts[item] > 0:
-            chunk_item_counts[item] -= 1
-        else:
-            p2_items_to_add.append(item)
-
-    # 6. Fill in the 'None' gaps in the child, using the items from parent 2
-    child_pointer = 0
-    p2_pointer = 0
+    # 3. Count the items in the chunk
+    chunk_item_counts = np.bincount(chunk, minlength=int(p2.max()) + 1)
     
-    while p2_pointer < len(p2_items_to_add):
-        if child_pointer == start:
-            child_pointer = end
-        
-        if child[child_pointer] is None:
-            child[child_pointer] = p2_items_to_add[p2_pointer]
-            p2_pointer += 1
-            
-        child_pointer += 1
+    # 4. Parent 2 gives every gene except the first chunk_item_counts[job] occurrences of each job:
+    #    occurrence number of each gene = its place inside its job's group after a stable sort
+    order = np.argsort(p2, kind='stable')
+    group_start = np.searchsorted(p2[order], p2[order])
+    occurrence = np.empty(size, dtype=np.intp)
+    occurrence[order] = np.arange(size) - group_start
+    p2_items_to_add = p2[occurrence >= chunk_item_counts[p2]]
+
+    # 5. Fill in the gaps around the chunk, in parent 2 order
+    child[:start] = p2_items_to_add[:start]
+    child[end:] = p2_items_to_add[start:]
         
     return child
 
 
-def mutation(chromosome, belief_space, mutation_rate=0.1):
+#inplace=True mutates a child that nobody else holds yet (fresh from crossover) instead of copying it.
+#op_ids: operation_ids() row of the chromosome (next_generation numbers a whole generation at once),
+#so situational knowledge finds both operations in the best schedule in O(1)
+def mutation(chromosome, belief_space, mutation_rate=0.1, inplace=False, rng=None, op_ids=None):
+    rng = rng or random
     
-    new_chromosome = copy.deepcopy(chromosome)
+    new_chromosome = chromosome if inplace else chromosome.copy()
     
     # --- 1. CULTURAL INFLUENCE (30% Chance) ---
     # This replaces your friend's 'influence_evolution' function.
-    if random.random() < 0.3: 
+    if rng.random() < 0.3: 
         
         # A. SITUATIONAL KNOWLEDGE (Copying the Leader)
         # Logic: "If Job A is before Job B in the Best Schedule, I should do that too."
-        best_ever = belief_space['best_schedule_so_far']
+        best_positions = belief_space.get('best_positions')
         
-        if best_ever: # Only if we have a history
+        if best_positions is not None: # Only if we have a history
             # Pick two random spots in our child
-            idx1, idx2 = sorted(random.sample(range(len(new_chromosome)), 2))
+            idx1, idx2 = sorted(rng.sample(range(len(new_chromosome)), 2))
             job_a = new_chromosome[idx1]
             job_b = new_chromosome[idx2]
             
-            # Check: Where are they in the Best Schedule?
-            try:
-                pos_a_in_best = best_ever.index(job_a)
-                pos_b_in_best = best_ever.index(job_b)
-                
-                # If the Best Schedule has B before A...
-                if pos_b_in_best < pos_a_in_best:
-                    # ...but WE have A before B (since idx1 < idx2)...
-                    # SWAP THEM to match the leader!
-                    new_chromosome[idx1], new_chromosome[idx2] = job_b, job_a
-                    return new_chromosome 
-            except ValueError:
-                pass 
+            # Check: Where are the same operations (same job, same occurrence) in the Best Schedule?
+            if op_ids is None:
+                op_ids = operation_ids(new_chromosome)[0]
+            pos_a_in_best = best_positions[op_ids[idx1]]
+            pos_b_in_best = best_positions[op_ids[idx2]]
+            
+            # If the Best Schedule has B before A...
+            if pos_b_in_best < pos_a_in_best:
+                # ...but WE have A before B (since idx1 < idx2)...
+                # SWAP THEM to match the leader!
+                new_chromosome[idx1], new_chromosome[idx2] = job_b, job_a
+                return new_chromosome 
 
         # B. DOMAIN KNOWLEDGE (Critical Jobs)
         # Logic: "Long/Critical jobs should be done FIRST."
         # (We assume even-numbered jobs are 'critical' for this example)
-        idx = random.randint(1, len(new_chromosome) - 1)
+        idx = rng.randint(1, len(new_chromosome) - 1)
         job_id = new_chromosome[idx]
         
         # Your friend's check: "if job_id in belief_space...critical_jobs"
@@ -109,9 +165,9 @@ def mutation(chromosome, belief_space, mutation_rate=0.1):
 
     # --- 2. STANDARD MUTATION (10% Chance) ---
     # If we didn't use culture, we check for a normal random mutation.
-    elif random.random() < mutation_rate:
+    elif rng.random() < mutation_rate:
         if len(new_chromosome) >= 2:
-            idx1, idx2 = random.sample(range(len(new_chromosome)), 2)
+            idx1, idx2 = rng.sample(range(len(new_chromosome)), 2)
             # Simple random swap
             new_chromosome[idx1], new_chromosome[idx2] = new_chromosome[idx2], new_chromosome[idx1]
 
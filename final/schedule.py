@@ -1,14 +1,22 @@
 import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
 
-#Loops 3shan n create random chromosome[0 ,1 , 0 , 1]
-def create_random_schedule(jobs_input):
+#genes are job ids: uint16 (2 bytes per gene) unless there are more jobs than it can hold
+def gene_type(num_jobs):
+    return np.uint16 if num_jobs <= np.iinfo(np.uint16).max + 1 else np.uint32
+
+#Loops 3shan n create random chromosome[0 ,1 , 0 , 1] (rng: a random.Random, default the global random module)
+def create_random_schedule(jobs_input, rng=None):
     operation_list = []
 
     for job_id, job_operations in enumerate(jobs_input):
         operation_list.extend([job_id] * len(job_operations))
 
-    random.shuffle(operation_list)
-    return operation_list
+    (rng or random).shuffle(operation_list)
+    return np.array(operation_list, dtype=gene_type(len(jobs_input)))
 
 #loops 3shan n calculate score to each schedule
 def calculate_fitness(schedule , jobs_input , num_machines):
@@ -43,4 +51,317 @@ def calculate_fitness(schedule , jobs_input , num_machines):
         
     makespan = max(machine_timers)
     return makespan
-# [[(0,2),(1,4),(2,3),(3,1)],[(1,3),(0,2),(1,1),(3,3)],[(0,3),(2,2),(1,3),(0,1)]]
\ No newline at end of file
+
+#tables 3shan el batch decoder: machine / duration of every operation, numbered job by job
+#(job 0 ops first, then job 1 ...), so op k of job j is entry first_op[j] + k
+def build_tables(jobs_input):
+    machines = np.array([m for job_operations in jobs_input for m, _ in job_operations], dtype=np.intp)
+    durations = np.array([d for job_operations in jobs_input for _, d in job_operations], dtype=np.int64)
+    return machines, durations
+
+#same decoding as calculate_fitness but for the whole population at once (one row = one chromosome)
+def calculate_fitness_batch(population, jobs_input, num_machines, tables=None):
+    machines, durations = tables if tables is not None else build_tables(jobs_input)
+    pop = np.asarray(population)
+    size, length = pop.shape
+    num_jobs = len(jobs_input)
+
+    # every row holds the same multiset of job ids, so after a stable sort by job id the gene that is
+    # op k of job j lands on position first_op[j] + k: scattering 0..length-1 through the sort order gives
+    # each gene its op number, written gene-major (gene k of every row is one contiguous row)
+    sort_type = np.uint16 if length <= np.iinfo(np.uint16).max else np.intp
+    order = np.argsort(pop.astype(sort_type, copy=False), axis=1, kind='stable')
+    order *= size
+    order += np.arange(size)[:, None]
+    op_ids = np.empty(length * size, dtype=np.intp)
+    op_ids[order] = np.arange(length)
+    op_ids = op_ids.reshape(length, size)
+
+    # machine timers (rows x machines) and job timers (rows x jobs) in two small flat arrays,
+    # gene-major index tables into them; one preallocated buffer for the end times of a step
+    rows = np.arange(size)
+    mach_idx = machines[op_ids]
+    mach_idx += rows * num_machines
+    job_idx = pop.T.astype(np.intp)
+    job_idx += rows * num_jobs
+    dur = durations[op_ids]
+
+    machine_timers = np.zeros(size * num_machines, dtype=np.int64)
+    job_timers = np.zeros(size * num_jobs, dtype=np.int64)
+    end = np.empty(size, dtype=np.int64)
+    for k in range(length):
+        m = mach_idx[k]
+        j = job_idx[k]
+        np.maximum(machine_timers[m], job_timers[j], out=end)
+        end += dur[k]
+        machine_timers[m] = end
+        job_timers[j] = end
+    return machine_timers.reshape(size, num_machines).max(axis=1)
+
+#idle gaps [start, end) of one machine in a treap keyed by start time; every node also keeps the longest
+#gap of its subtree, so the earliest gap an operation fits in is found in O(log n) (expected)
+class GapIndex:
+    def __init__(self):
+        self.root = -1
+        self.left, self.right, self.prio = [], [], []
+        self.start, self.end, self.longest = [], [], []
+
+    def _pull(self, t):
+        best = self.end[t] - self.start[t]
+        for c in (self.left[t], self.right[t]):
+            if c != -1 and self.longest[c] > best:
+                best = self.longest[c]
+        self.longest[t] = best
+
+    def _split(self, t, key, inclusive=False):
+        # (starts < key, starts >= key), or (<= key, > key) when inclusive
+        if t == -1:
+            return -1, -1
+        if self.start[t] < key or (inclusive and self.start[t] == key):
+            a, b = self._split(self.right[t], key, inclusive)
+            self.right[t] = a
+            self._pull(t)
+            return t, b
+        a, b = self._split(self.left[t], key, inclusive)
+        self.left[t] = b
+        self._pull(t)
+        return a, t
+
+    def _merge(self, a, b):
+        if a == -1 or b == -1:
+            return a if b == -1 else b
+        if self.prio[a] > self.prio[b]:
+            self.right[a] = self._merge(self.right[a], b)
+            self._pull(a)
+            return a
+        self.left[b] = self._merge(a, self.left[b])
+        self._pull(b)
+        return b
+
+    def add(self, start, end):
+        t = len(self.start)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.prio.append((t * 2654435761) & 0xffffffff)   # hashed node number: balanced enough, no global random state
+        self.start.append(start)
+        self.end.append(end)
+        self.longest.append(end - start)
+        a, b = self._split(self.root, start)
+        self.root = self._merge(self._merge(a, t), b)
+
+    def remove(self, start):
+        a, b = self._split(self.root, start)
+        _, c = self._split(b, start, inclusive=True)
+        self.root = self._merge(a, c)
+
+    def find(self, ready, duration):
+        # earliest (gap start, gap end, operation start) that fits the operation, or None
+        # 1. the gap that contains `ready` (last gap starting at or before it)
+        t, pred = self.root, -1
+        while t != -1:
+            if self.start[t] <= ready:
+                pred, t = t, self.right[t]
+            else:
+                t = self.left[t]
+        if pred != -1 and self.end[pred] - ready >= duration:
+            return self.start[pred], self.end[pred], ready
+        # 2. otherwise the first later gap that is long enough: split off the gaps starting after `ready`
+        #    and follow the longest-gap values down that part only
+        a, b = self._split(self.root, ready, inclusive=True)
+        t, found = b, -1
+        while t != -1 and self.longest[t] >= duration:
+            l = self.left[t]
+            if l != -1 and self.longest[l] >= duration:
+                t = l
+            elif self.end[t] - self.start[t] >= duration:
+                found = t
+                break
+            else:
+                t = self.right[t]
+        self.root = self._merge(a, b)
+        return None if found == -1 else (self.start[found], self.end[found], self.start[found])
+
+
+#active decoder: like calculate_fitness, but an operation goes into the earliest idle gap of its machine
+#that it fits in (after its job is ready) instead of always after the machine's last operation.
+#returns (job, op, machine, start, end) for every gene, in chromosome order
+def decode_active(schedule, jobs_input, num_machines):
+    machine_timers = [0] * num_machines
+    job_timers = [0] * len(jobs_input)
+    operation_counters = [0] * len(jobs_input)
+    gaps = [GapIndex() for _ in range(num_machines)]
+    placed = []
+
+    for job_id in schedule:
+        op_index = operation_counters[job_id]
+        machine_id, duration = jobs_input[job_id][op_index]
+        job_ready_time = job_timers[job_id]
+
+        fit = gaps[machine_id].find(job_ready_time, duration)
+        if fit is not None:
+            gap_start, gap_end, start_time = fit
+            end_time = start_time + duration
+            gaps[machine_id].remove(gap_start)
+            if start_time > gap_start:
+                gaps[machine_id].add(gap_start, start_time)
+            if gap_end > end_time:
+                gaps[machine_id].add(end_time, gap_end)
+        else:
+            start_time = max(machine_timers[machine_id], job_ready_time)
+            if start_time > machine_timers[machine_id]:
+                gaps[machine_id].add(machine_timers[machine_id], start_time)
+            end_time = start_time + duration
+            machine_timers[machine_id] = end_time
+
+        job_timers[job_id] = end_time
+        operation_counters[job_id] += 1
+        placed.append((int(job_id), op_index, machine_id, start_time, end_time))
+    return placed
+
+def calculate_fitness_active(schedule, jobs_input, num_machines):
+    return max(end for _, _, _, _, end in decode_active(schedule, jobs_input, num_machines))
+
+def calculate_fitness_active_batch(population, jobs_input, num_machines, tables=None):
+    return np.array([calculate_fitness_active(c, jobs_input, num_machines) for c in population], dtype=np.int64)
+
+#plain (semi-active) decoding with the placed operations, same output format as decode_active
+def decode_semi_active(schedule, jobs_input, num_machines):
+    machine_timers = [0] * num_machines
+    job_timers = [0] * len(jobs_input)
+    operation_counters = [0] * len(jobs_input)
+    placed = []
+    for job_id in schedule:
+        op_index = operation_counters[job_id]
+        machine_id, duration = jobs_input[job_id][op_index]
+        start_time = max(machine_timers[machine_id], job_timers[job_id])
+        end_time = start_time + duration
+        machine_timers[machine_id] = end_time
+        job_timers[job_id] = end_time
+        operation_counters[job_id] += 1
+        placed.append((int(job_id), op_index, machine_id, start_time, end_time))
+    return placed
+
+DECODERS = {"semi-active": decode_semi_active, "active": decode_active}
+BATCH_DECODERS = {"semi-active": calculate_fitness_batch, "active": calculate_fitness_active_batch}
+
+#LRU cache of makespans 3shan elites w children that did not change are never decoded twice
+class FitnessCache:
+    def __init__(self, max_size=10000, decode=None):
+        self.max_size = max_size
+        self.decode = decode or calculate_fitness_batch
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(chromosome):
+        # raw bytes of the gene array: cheap to build and hash, and compared exactly on lookup
+        return np.asarray(chromosome).tobytes()
+
+    def evaluate(self, population, jobs_input, num_machines, tables=None):
+        keys = [self.key(c) for c in population]
+        scores = [None] * len(population)
+        todo = {}   # key -> index of the first chromosome that needs decoding
+        for i, k in enumerate(keys):
+            cached = self.table.get(k)
+            if cached is not None:
+                self.table.move_to_end(k)
+                scores[i] = cached
+                self.hits += 1
+            elif k in todo:
+                self.hits += 1
+            else:
+                todo[k] = i
+                self.misses += 1
+        if todo:
+            fresh = self.decode([population[i] for i in todo.values()], jobs_input, num_machines, tables)
+            fresh = np.asarray(fresh).tolist()
+            for k, f in zip(todo, fresh):
+                self.table[k] = f
+            new = dict(zip(todo, fresh))
+            for i, k in enumerate(keys):
+                if scores[i] is None:
+                    scores[i] = new[k]
+        while len(self.table) > self.max_size:
+            self.table.popitem(last=False)
+        return scores
+
+    def store(self, chromosome, fitness):
+        # makespan already known (e.g. from local search): remember it without decoding
+        self.table[self.key(chromosome)] = fitness
+        while len(self.table) > self.max_size:
+            self.table.popitem(last=False)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+#parallel decoding: the population matrix lives in a shared memory block, every worker gets the
+#instance once (pool initializer) and only (block name, shape, row range) travels with each task
+_eval_jobs = None
+_eval_machines = None
+_eval_tables = None
+_eval_shm = None
+_eval_dtype = None
+_eval_decode = None
+
+def _init_eval_worker(jobs_input, num_machines, decoder):
+    global _eval_jobs, _eval_machines, _eval_tables, _eval_dtype, _eval_decode
+    _eval_jobs, _eval_machines, _eval_decode = jobs_input, num_machines, BATCH_DECODERS[decoder]
+    _eval_tables = build_tables(jobs_input)
+    _eval_dtype = gene_type(len(jobs_input))
+
+def _eval_rows(name, rows, length, start, end):
+    global _eval_shm
+    if _eval_shm is None or _eval_shm.name != name:
+        if _eval_shm is not None:
+            _eval_shm.close()
+        _eval_shm = shared_memory.SharedMemory(name=name)
+    pop = np.ndarray((rows, length), dtype=_eval_dtype, buffer=_eval_shm.buf)
+    return _eval_decode(pop[start:end], _eval_jobs, _eval_machines, _eval_tables)
+
+class ParallelEvaluator:
+    def __init__(self, jobs_input, num_machines, workers, capacity=64, decoder="semi-active"):
+        self.workers = workers
+        self.length = sum(len(job_operations) for job_operations in jobs_input)
+        self.dtype = gene_type(len(jobs_input))
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_eval_worker, initargs=(jobs_input, num_machines, decoder))
+        self.shm = None
+        self.capacity = 0
+        self._grow(capacity)
+
+    def _grow(self, rows):
+        # the block is only reallocated when a batch is bigger than every earlier one
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+        self.capacity = rows
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, rows * self.length * np.dtype(self.dtype).itemsize))
+        self.matrix = np.ndarray((rows, self.length), dtype=self.dtype, buffer=self.shm.buf)
+
+    # same signature as calculate_fitness_batch so it can be handed to FitnessCache as decoder
+    def __call__(self, population, jobs_input=None, num_machines=None, tables=None):
+        rows = len(population)
+        if rows > self.capacity:
+            self._grow(rows)
+        self.matrix[:rows] = population
+        step = -(-rows // self.workers)
+        futures = [self.pool.submit(_eval_rows, self.shm.name, self.capacity, self.length, start, min(start + step, rows))
+                   for start in range(0, rows, step)]
+        return np.concatenate([f.result() for f in futures])
+
+    def close(self):
+        self.pool.shutdown()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# [[(0,2),(1,4),(2,3),(3,1)],[(1,3),(0,2),(1,1),(3,3)],[(0,3),(2,2),(1,3),(0,1)]]
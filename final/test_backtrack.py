@@ -0,0 +1,56 @@
+import pytest
+from backtrack import Scheduler, Job, Op
+
+JOBS_INPUT = [[(0, 2), (1, 4), (2, 3), (3, 1)], [(1, 3), (0, 2), (1, 1), (3, 3)], [(0, 3), (2, 2), (1, 3), (0, 1)]]
+
+
+def make_scheduler(**kw):
+    jobs = [Job(j, [Op(k, d, m) for k, (m, d) in enumerate(ops)]) for j, ops in enumerate(JOBS_INPUT)]
+    return Scheduler(4, jobs, **kw)
+
+
+@pytest.fixture(scope="module")
+def optimum():
+    _, ms = make_scheduler(tt_size=10_000).solve()
+    return ms
+
+
+def test_bound_above_optimum_is_beaten(optimum):
+    s = make_scheduler()
+    best, ms = s.solve(incumbent=optimum + 3)
+    assert ms == optimum and s.optimal and s.infeasible_bound is None
+    assert max(a.e for a in best) == ms
+
+
+def test_bound_below_optimum_falls_back_to_full_search(optimum):
+    s = make_scheduler()
+    best, ms = s.solve(incumbent=optimum - 1)
+    assert best is not None and ms == optimum and s.optimal
+    assert s.infeasible_bound == optimum - 1
+
+
+def test_bound_below_optimum_under_node_limit_keeps_a_schedule(optimum):
+    s = make_scheduler()
+    best, ms = s.solve(incumbent=optimum - 1, max_nodes=5)
+    assert best is not None and max(a.e for a in best) == ms >= optimum
+    assert not s.optimal and s.stop_reason == "node_limit" and s.infeasible_bound is None
+
+
+@pytest.mark.parametrize("run", [lambda s: s.solve_lds(1), lambda s: s.solve_beam(4),
+                                 lambda s: s.solve_parallel(2)])
+def test_other_solvers_fall_back_from_an_infeasible_bound(optimum, run):
+    s = make_scheduler()
+    s.set_incumbent(optimum - 5)
+    best, ms = run(s)
+    assert best is not None and max(a.e for a in best) == ms >= optimum
+
+
+def test_parallel_node_limit_is_shared_by_the_workers():
+    import random
+    from backtrack import POLL_EVERY
+    rng = random.Random(1)
+    jobs = [Job(j, [Op(k, rng.randint(1, 9), m) for k, m in enumerate(rng.sample(range(6), 6))]) for j in range(8)]
+    s = Scheduler(6, jobs)
+    best, ms = s.solve_parallel(3, split_nodes=1000, max_nodes=5000)
+    assert s.stop_reason == "node_limit" and not s.optimal and best is not None
+    assert s.tracker.nodes <= 5000 + 3 * POLL_EVERY
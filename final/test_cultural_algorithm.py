@@ -0,0 +1,21 @@
+import random
+import pytest
+import schedule
+from cultural_algorithm import solve_with_ca, solve_with_ca_islands
+
+JOBS_INPUT = [[(0, 2), (1, 4), (2, 3), (3, 1)], [(1, 3), (0, 2), (1, 1), (3, 3)], [(0, 3), (2, 2), (1, 3), (0, 1)]]
+
+
+# generations without any crossed child must still run (empty crossover batch)
+@pytest.mark.parametrize("kwargs", [{'crossover_rate': 0.0}, {'population_size': 2}, {'elite_ratio': 1.0}])
+def test_generations_without_crossover(kwargs):
+    chromosome, fitness = solve_with_ca(JOBS_INPUT, 4, verbose=False, generations=20, rng=random.Random(0), **kwargs)
+    assert fitness == schedule.calculate_fitness(chromosome, JOBS_INPUT, 4)
+
+
+# islands run evolve_ca, so its options reach them; one that stops early must not leave the others waiting
+def test_islands_with_evolve_ca_options():
+    best, fitness, stats = solve_with_ca_islands(JOBS_INPUT, 4, islands=3, interval=2, generations=12, seed=1,
+                                                 population_size=10, stagnation=2, decoder="active")
+    assert fitness == schedule.calculate_fitness_active(best, JOBS_INPUT, 4)
+    assert all(st['stop_reason'] == "stagnation" for st in stats)